@@ -0,0 +1,74 @@
+from django.contrib import admin
+from django.http import Http404
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from api.models import ProfileReport, SlowQuery
+from api.profiling import get_report, list_reports
+
+
+@admin.register(ProfileReport)
+class ProfileReportAdmin(admin.ModelAdmin):
+    def has_module_permission(self, request):
+        return request.user.is_staff
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_staff
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path("", self.admin_site.admin_view(self.changelist_view),
+                 name="%s_%s_changelist" % info),
+            path("<str:report_id>/",
+                 self.admin_site.admin_view(self.report_view),
+                 name="%s_%s_change" % info),
+        ]
+
+    def get_context(self, request, title, **kwargs):
+        return {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": title,
+            **kwargs,
+        }
+
+    def changelist_view(self, request, extra_context=None):
+        return TemplateResponse(
+            request,
+            "admin/api/profilereport/change_list.html",
+            self.get_context(request, "Профили запросов",
+                             reports=list_reports()),
+        )
+
+    def report_view(self, request, report_id):
+        report = get_report(report_id)
+        if report is None:
+            raise Http404("Профиль не найден")
+        return TemplateResponse(
+            request,
+            "admin/api/profilereport/report.html",
+            self.get_context(request, report["path"], report=report),
+        )
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ("view", "calls", "total_time", "max_time", "last_seen")
+    list_filter = ("view",)
+    search_fields = ("sql",)
+    ordering = ("-total_time",)
+    readonly_fields = ("fingerprint", "view", "sql", "calls", "total_time",
+                       "max_time", "explain", "first_seen", "last_seen")
+
+    def has_add_permission(self, request):
+        return False
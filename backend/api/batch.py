@@ -0,0 +1,174 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connection
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from django.utils import translation
+from rest_framework import status
+from rest_framework.response import Response
+
+BATCH_PATH_PREFIX = "/api/"
+EXCLUDED_PATHS = ("/api/batch/",)
+FORWARDED_META = ("SERVER_NAME", "SERVER_PORT", "REMOTE_ADDR",
+                  "wsgi.url_scheme")
+DROPPED_HEADERS = ("HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE",
+                   "HTTP_CONTENT_TYPE", "HTTP_CONTENT_LENGTH")
+RESPONSE_HEADERS = ("ETag", "Last-Modified", "Cache-Control")
+
+logger = logging.getLogger(__name__)
+
+
+class CachedCursor:
+    def __init__(self, rows, description, cursor=None):
+        self.rows = rows
+        self.position = 0
+        self.description = description
+        self.rowcount = len(rows)
+        self.cursor = cursor
+
+    def fetchone(self):
+        if self.position >= len(self.rows):
+            return None
+        self.position += 1
+        return self.rows[self.position - 1]
+
+    def fetchmany(self, size=1):
+        rows = self.rows[self.position:self.position + size]
+        self.position += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self.rows[self.position:]
+        self.position = len(self.rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        if self.cursor is not None:
+            self.cursor.close()
+
+
+class QueryCache:
+    def __init__(self):
+        self.results = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if many or not sql.lstrip().upper().startswith("SELECT"):
+            return execute(sql, params, many, context)
+        key = (sql, repr(params))
+        wrapper = context["cursor"]
+        with self.lock:
+            cached = self.results.get(key)
+            if cached is not None:
+                self.hits += 1
+        if cached is None:
+            result = execute(sql, params, many, context)
+            cursor = wrapper.cursor
+            cached = (cursor.fetchall(), cursor.description)
+            with self.lock:
+                self.results[key] = cached
+            wrapper.cursor = CachedCursor(*cached, cursor=cursor)
+            return result
+        wrapper.cursor = CachedCursor(*cached)
+        return None
+
+
+def build_request(request, path):
+    url = urlsplit(path)
+    sub_request = HttpRequest()
+    sub_request.method = "GET"
+    sub_request.path = sub_request.path_info = url.path
+    sub_request.META = {
+        name: value for name, value in request.META.items()
+        if (name.startswith("HTTP_") and name not in DROPPED_HEADERS)
+        or name in FORWARDED_META
+    }
+    sub_request.META.update(REQUEST_METHOD="GET", PATH_INFO=url.path,
+                            QUERY_STRING=url.query)
+    sub_request.GET = QueryDict(url.query)
+    sub_request._get_scheme = lambda: request.scheme
+    if request.user.is_authenticated:
+        sub_request.user = request.user
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def response_body(response):
+    if getattr(response, "data", None) is not None:
+        return response.data
+    if hasattr(response, "render"):
+        response.render()
+    if response.streaming:
+        try:
+            content = b"".join(response.streaming_content)
+        finally:
+            response.close()
+    else:
+        content = response.content
+    if response.get("Content-Type", "").startswith("application/json"):
+        return json.loads(content)
+    return content.decode(response.charset)
+
+
+def run_one(request, path, query_cache, language):
+    if (not path.startswith(BATCH_PATH_PREFIX)
+            or path.startswith(EXCLUDED_PATHS)):
+        return {"path": path, "status": status.HTTP_400_BAD_REQUEST,
+                "body": {"detail": "Недопустимый путь."}}
+    translation.activate(language)
+    sub_request = build_request(request, path)
+    try:
+        match = resolve(sub_request.path_info)
+        with connection.execute_wrapper(query_cache):
+            response = match.func(sub_request, *match.args, **match.kwargs)
+            body = response_body(response)
+    except (Resolver404, Http404):
+        return {"path": path, "status": status.HTTP_404_NOT_FOUND,
+                "body": {"detail": "Страница не найдена."}}
+    except Exception:
+        logger.exception("Ошибка подзапроса %s", path)
+        return {"path": path,
+                "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "body": {"detail": "Внутренняя ошибка сервера."}}
+    return {
+        "path": path,
+        "status": response.status_code,
+        "headers": {name: response[name] for name in RESPONSE_HEADERS
+                    if name in response},
+        "body": body,
+    }
+
+
+def run_in_thread(*args):
+    try:
+        return run_one(*args)
+    finally:
+        connection.close()
+
+
+def run_batch(request, paths):
+    query_cache = QueryCache()
+    language = translation.get_language()
+    workers = min(settings.BATCH_MAX_WORKERS, len(paths))
+    if workers <= 1:
+        results = [run_one(request, path, query_cache, language)
+                   for path in paths]
+    else:
+        with ThreadPoolExecutor(workers) as executor:
+            results = list(executor.map(
+                lambda path: run_in_thread(request, path, query_cache,
+                                           language),
+                paths,
+            ))
+    return Response({"responses": results,
+                     "cached_queries": query_cache.hits})
@@ -0,0 +1,239 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import parse_http_date, quote_etag
+from rest_framework import status
+
+REFERENCE_GENERATION_KEY = "reference-data:generation"
+RECIPE_GENERATION_KEY = "recipes:generation"
+TRENDING_GENERATION_KEY = "recipes:trending-generation"
+RESPONSE_CACHE_PREFIX = "response-cache"
+FACETS_CACHE_PREFIX = "facets"
+FACETS_IGNORED_PARAMS = {"tags", "page", "limit", "ordering", "fields",
+                         "expand", "profile"}
+RESPONSE_CACHE_METRICS = ("hit", "miss", "wait")
+RESPONSE_CACHE_POLL_INTERVAL = 0.05
+
+
+def get_generation(key):
+    generation = cache.get(key)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        if not cache.add(key, generation, None):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def bump_generation(key):
+    cache.set(key, uuid.uuid4().hex, None)
+
+
+def facets_cache_key(request, user_specific):
+    params = sorted(
+        (name, sorted(value for value in values if value))
+        for name, values in request.query_params.lists()
+        if name not in FACETS_IGNORED_PARAMS
+    )
+    generations = [get_generation(RECIPE_GENERATION_KEY)]
+    user_id = None
+    if user_specific:
+        generations.append(get_generation(TRENDING_GENERATION_KEY))
+        user_id = request.user.pk
+    digest = hashlib.sha1(
+        repr((params, user_id, generations)).encode()).hexdigest()
+    return f"{FACETS_CACHE_PREFIX}:{digest}"
+
+
+def patch_user_cache_headers(response, shared):
+    if shared:
+        patch_cache_control(response, no_cache=True, public=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ["Authorization"])
+
+
+def increment_metric(name):
+    key = f"{RESPONSE_CACHE_PREFIX}:metrics:{name}"
+    if not cache.add(key, 1, None):
+        cache.incr(key)
+
+
+def response_cache_metrics():
+    return {
+        name: cache.get(f"{RESPONSE_CACHE_PREFIX}:metrics:{name}", 0)
+        for name in RESPONSE_CACHE_METRICS
+    }
+
+
+def reset_response_cache_metrics():
+    cache.delete_many([f"{RESPONSE_CACHE_PREFIX}:metrics:{name}"
+                       for name in RESPONSE_CACHE_METRICS])
+
+
+class LocalResponseCache:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, generation):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != generation:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, generation, value):
+        with self.lock:
+            self.entries[key] = (generation, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+reference_responses = LocalResponseCache(
+    settings.REFERENCE_CACHE_MAX_ENTRIES)
+
+
+class ReferenceDataCacheMixin:
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.accepted_renderer.format != "json":
+            return handler(request, *args, **kwargs)
+        generation = get_generation(REFERENCE_GENERATION_KEY)
+        key = request.get_full_path()
+        etag = quote_etag(
+            hashlib.sha1(f"{generation}:{key}".encode()).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            cached = reference_responses.get(key, generation)
+            if cached is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cached = (
+                    request.accepted_renderer.render(
+                        response.data, request.accepted_media_type,
+                        self.get_renderer_context()),
+                    request.accepted_media_type,
+                )
+                reference_responses.set(key, generation, cached)
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+        response["ETag"] = etag
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.REFERENCE_CACHE_MAX_AGE,
+            stale_while_revalidate=settings.REFERENCE_CACHE_STALE_AGE,
+        )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args,
+                                    **kwargs)
+
+
+class AnonymousResponseCacheMixin:
+    response_cache_generations = (RECIPE_GENERATION_KEY,)
+
+    def get_response_cache_generations(self):
+        return self.response_cache_generations
+
+    def is_shared_response(self):
+        return False
+
+    def get_response_cache_key(self, request):
+        params = sorted(
+            (name, sorted(value for value in values if value))
+            for name, values in request.query_params.lists()
+        )
+        params = [(name, values) for name, values in params
+                  if values and (name, values) != ("page", ["1"])]
+        generations = [get_generation(key)
+                       for key in self.get_response_cache_generations()]
+        digest = hashlib.sha1(repr((
+            request.path, request.accepted_media_type, params, generations,
+        )).encode()).hexdigest()
+        return f"{RESPONSE_CACHE_PREFIX}:{digest}"
+
+    def render_cacheable(self, handler, request, *args, **kwargs):
+        response = handler(request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response, None
+        content = request.accepted_renderer.render(
+            response.data, request.accepted_media_type,
+            self.get_renderer_context())
+        headers = {name: response[name]
+                   for name in ("ETag", "Last-Modified") if name in response}
+        return None, (content, request.accepted_media_type, headers)
+
+    def wait_for_entry(self, key):
+        deadline = time.monotonic() + settings.RESPONSE_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(RESPONSE_CACHE_POLL_INTERVAL)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        return None
+
+    def anonymous_cached_response(self, handler, request, *args, **kwargs):
+        if ((request.user.is_authenticated
+                and not self.is_shared_response())
+                or request.accepted_renderer.format != "json"):
+            return handler(request, *args, **kwargs)
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            increment_metric("hit")
+        elif cache.add(f"{key}:lock", 1,
+                       settings.RESPONSE_CACHE_LOCK_TIMEOUT):
+            increment_metric("miss")
+            try:
+                response, cached = self.render_cacheable(
+                    handler, request, *args, **kwargs)
+                if response is not None:
+                    return response
+                cache.set(key, cached, settings.RESPONSE_CACHE_TIMEOUT)
+            finally:
+                cache.delete(f"{key}:lock")
+        else:
+            increment_metric("wait")
+            cached = self.wait_for_entry(key)
+            if cached is None:
+                return handler(request, *args, **kwargs)
+        content, content_type, headers = cached
+        last_modified = headers.get("Last-Modified")
+        response = get_conditional_response(
+            request,
+            etag=headers.get("ETag"),
+            last_modified=last_modified and parse_http_date(last_modified),
+        )
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        for name, value in headers.items():
+            response[name] = value
+        patch_user_cache_headers(response, self.is_shared_response())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.anonymous_cached_response(super().list, request, *args,
+                                              **kwargs)
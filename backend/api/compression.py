@@ -0,0 +1,136 @@
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from api.cache import LocalResponseCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/csv")
+
+
+def gzip_compressor(level, size=-1):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+
+def brotli_compressor(level, size=-1):
+    compressor = brotli.Compressor(quality=level)
+    return compressor.process, compressor.finish
+
+
+def zstd_compressor(level, size=-1):
+    compressor = zstandard.ZstdCompressor(level=level).compressobj(size=size)
+    return compressor.compress, compressor.flush
+
+
+# Order is the server preference on equal q; the second level is used for
+# responses that are compressed once and cached by ETag.
+CODECS = {
+    name: codec for name, codec in (
+        ("zstd", (zstd_compressor, 3, 9) if zstandard else None),
+        ("br", (brotli_compressor, 4, 5) if brotli else None),
+        ("gzip", (gzip_compressor, 6, 9)),
+    ) if codec is not None
+}
+
+compressed_responses = LocalResponseCache(
+    settings.COMPRESSION_CACHE_MAX_ENTRIES)
+
+
+def parse_accept_encoding(header):
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate(header):
+    accepted = parse_accept_encoding(header)
+    default = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for name in CODECS:
+        quality = accepted.get(name, default)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compress(data, encoding, cached=False):
+    factory, level, cached_level = CODECS[encoding]
+    process, finish = factory(cached_level if cached else level, len(data))
+    return process(data) + finish()
+
+
+def compress_stream(chunks, encoding):
+    factory, level, _ = CODECS[encoding]
+    process, finish = factory(level)
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get("Content-Type", "")
+        if (response.status_code != 200
+                or response.has_header("Content-Encoding")
+                or not content_type.startswith(COMPRESSIBLE_TYPES)):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+        encoding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding)
+            del response["Content-Length"]
+        else:
+            response.content = self.compress_content(response, encoding)
+            response["Content-Length"] = str(len(response.content))
+        etag = response.get("ETag")
+        if etag and not etag.startswith("W/"):
+            response["ETag"] = f"W/{etag}"
+        response["Content-Encoding"] = encoding
+        return response
+
+    def compress_content(self, response, encoding):
+        etag = response.get("ETag")
+        if not etag:
+            return compress(response.content, encoding)
+        key = (encoding, etag)
+        content = compressed_responses.get(key, len(response.content))
+        if content is None:
+            content = compress(response.content, encoding, cached=True)
+            compressed_responses.set(key, len(response.content), content)
+        return content
@@ -0,0 +1,326 @@
+import asyncio
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import DatabaseError, close_old_connections, connection
+from django.utils.module_loading import import_string
+
+from users.models import Subscription
+
+logger = logging.getLogger(__name__)
+
+EVENTS_PATH = "/api/events/"
+NOTIFY_CHANNEL = "foodgram_events"
+HEARTBEAT = b": ping\n\n"
+CLOSED = object()
+TICKET_SALT = "api.events.ticket"
+
+User = get_user_model()
+
+
+def recipe_event(recipe):
+    return {
+        "type": "recipe",
+        "author": recipe.author_id,
+        "recipe": {
+            "id": recipe.id,
+            "name": recipe.name,
+            "cooking_time": recipe.cooking_time,
+        },
+    }
+
+
+def follow_event(subscription, followed):
+    return {
+        "type": "follow" if followed else "unfollow",
+        "user": subscription.user_id,
+        "author": subscription.author_id,
+    }
+
+
+class Listener:
+    __slots__ = ("user_id", "authors", "messages", "waiter")
+
+    def __init__(self, user_id, authors):
+        self.user_id = user_id
+        self.authors = authors
+        self.messages = deque()
+        self.waiter = None
+
+    def push(self, message):
+        if (len(self.messages) >= settings.EVENTS_QUEUE_SIZE
+                and message is not CLOSED):
+            return
+        self.messages.append(message)
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(None)
+
+    async def get(self):
+        while not self.messages:
+            self.waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+        return self.messages.popleft()
+
+
+class Hub:
+    def __init__(self):
+        self.users = defaultdict(set)
+        self.followers = defaultdict(set)
+        self.loop = None
+
+    def start(self):
+        if self.loop is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.loop.create_task(self.heartbeat())
+        get_backend().listen(self.dispatch_threadsafe)
+
+    def add(self, listener):
+        self.users[listener.user_id].add(listener)
+        for author in listener.authors:
+            self.followers[author].add(listener)
+
+    def remove(self, listener):
+        self.users[listener.user_id].discard(listener)
+        if not self.users[listener.user_id]:
+            del self.users[listener.user_id]
+        for author in listener.authors:
+            self.unfollow(listener, author)
+
+    def unfollow(self, listener, author):
+        followers = self.followers.get(author)
+        if followers is not None:
+            followers.discard(listener)
+            if not followers:
+                del self.followers[author]
+
+    def dispatch(self, message):
+        if message["type"] == "recipe":
+            payload = encode(message)
+            for listener in tuple(self.followers.get(message["author"], ())):
+                listener.push(payload)
+            return
+        for listener in self.users.get(message["user"], ()):
+            if message["type"] == "follow":
+                listener.authors.add(message["author"])
+                self.followers[message["author"]].add(listener)
+            else:
+                listener.authors.discard(message["author"])
+                self.unfollow(listener, message["author"])
+
+    def dispatch_threadsafe(self, message):
+        self.loop.call_soon_threadsafe(self.dispatch, message)
+
+    async def heartbeat(self):
+        while True:
+            await asyncio.sleep(settings.EVENTS_HEARTBEAT)
+            for listeners in tuple(self.users.values()):
+                for listener in listeners:
+                    listener.push(HEARTBEAT)
+
+    def __len__(self):
+        return sum(len(listeners) for listeners in self.users.values())
+
+
+hub = Hub()
+
+
+class LocalBackend:
+    def publish(self, message):
+        if hub.loop is not None:
+            hub.dispatch_threadsafe(message)
+
+    def listen(self, deliver):
+        pass
+
+
+class SocketBackend:
+    def __init__(self):
+        self.directory = Path(settings.EVENTS_SOCKET_DIR)
+
+    def publish(self, message):
+        payload = json.dumps(message).encode()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            for path in self.directory.glob("*.sock"):
+                try:
+                    sender.sendto(payload, str(path))
+                except (ConnectionRefusedError, FileNotFoundError):
+                    path.unlink(missing_ok=True)
+                except BlockingIOError:
+                    logger.warning("Очередь событий %s переполнена", path)
+
+    def listen(self, deliver):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.bind(str(path))
+        receiver.setblocking(False)
+
+        def read():
+            while True:
+                try:
+                    payload = receiver.recv(65536)
+                except BlockingIOError:
+                    return
+                deliver(json.loads(payload))
+
+        asyncio.get_running_loop().add_reader(receiver, read)
+
+
+class PostgresBackend:
+    def publish(self, message):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)",
+                           [NOTIFY_CHANNEL, json.dumps(message)])
+
+    def listen(self, deliver):
+        threading.Thread(target=self.run, args=(deliver,),
+                         daemon=True).start()
+
+    def run(self, deliver):
+        import psycopg2
+
+        params = connection.get_connection_params()
+        while True:
+            listener = None
+            try:
+                listener = psycopg2.connect(**params)
+                listener.autocommit = True
+                with listener.cursor() as cursor:
+                    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                while True:
+                    select.select([listener], [], [], 5)
+                    listener.poll()
+                    while listener.notifies:
+                        notify = listener.notifies.pop(0)
+                        deliver(json.loads(notify.payload))
+            except psycopg2.Error:
+                logger.exception("Соединение LISTEN потеряно")
+                time.sleep(1)
+            finally:
+                if listener is not None:
+                    listener.close()
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.EVENTS_BACKEND)()
+    return _backend
+
+
+def publish_event(message):
+    try:
+        get_backend().publish(message)
+    except (OSError, DatabaseError):
+        logger.exception("Не удалось отправить событие %s", message["type"])
+
+
+def issue_ticket(user):
+    return signing.dumps(user.pk, salt=TICKET_SALT)
+
+
+def _credentials_from_scope(scope):
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            keyword, _, key = value.decode("latin1").partition(" ")
+            if keyword == "Token":
+                return {"auth_token": key}
+    ticket = parse_qs(scope["query_string"].decode()).get("ticket", [None])[0]
+    if ticket is None:
+        return None
+    try:
+        return {"pk": signing.loads(ticket, salt=TICKET_SALT,
+                                    max_age=settings.EVENTS_TICKET_MAX_AGE)}
+    except signing.BadSignature:
+        return None
+
+
+@sync_to_async
+def _authenticate(credentials):
+    close_old_connections()
+    try:
+        user_id = (User.objects.filter(is_active=True, **credentials)
+                   .values_list("pk", flat=True).first())
+        if user_id is None:
+            return None, None
+        authors = set(Subscription.objects.filter(user=user_id)
+                      .values_list("author_id", flat=True))
+        return user_id, authors
+    finally:
+        close_old_connections()
+
+
+async def _respond(send, status, body=b""):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _wait_disconnect(receive, listener):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+    listener.push(CLOSED)
+
+
+def encode(message):
+    return (f"event: {message['type']}\n"
+            f"data: {json.dumps(message, ensure_ascii=False)}\n\n").encode()
+
+
+async def event_stream(scope, receive, send):
+    credentials = _credentials_from_scope(scope)
+    user_id, authors = (await _authenticate(credentials) if credentials
+                        else (None, None))
+    if user_id is None:
+        await _respond(send, 401, json.dumps(
+            {"detail": "Учетные данные не были предоставлены."},
+            ensure_ascii=False).encode())
+        return
+    hub.start()
+    await stream(Listener(user_id, authors), receive, send)
+
+
+async def stream(listener, receive, send):
+    hub.add(listener)
+    disconnect = asyncio.ensure_future(_wait_disconnect(receive, listener))
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        await send({"type": "http.response.body", "more_body": True,
+                    "body": b"retry: 5000\n\n"})
+        while True:
+            message = await listener.get()
+            if message is CLOSED:
+                break
+            await send({"type": "http.response.body", "more_body": True,
+                        "body": message})
+    finally:
+        disconnect.cancel()
+        hub.remove(listener)
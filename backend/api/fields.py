@@ -1,4 +1,5 @@
 import base64
+import binascii
 
 from django.core.files.base import ContentFile
 from rest_framework import serializers
@@ -7,7 +8,11 @@ from rest_framework import serializers
 class Base64ImageField(serializers.ImageField):
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith("data:image"):
-            format, imgstr = data.split(";base64,")
+            format, _, imgstr = data.partition(";base64,")
             ext = format.split("/")[-1]
-            data = ContentFile(base64.b64decode(imgstr), name="temp." + ext)
+            try:
+                content = base64.b64decode(imgstr, validate=True)
+            except binascii.Error:
+                self.fail("invalid_image")
+            data = ContentFile(content, name="temp." + ext)
         return super().to_internal_value(data)
@@ -1,4 +1,4 @@
-from django_filters.rest_framework import BooleanFilter, FilterSet
+from django_filters.rest_framework import BooleanFilter, FilterSet, RangeFilter
 
 from recipes.models import Recipe
 
@@ -6,10 +6,11 @@ from recipes.models import Recipe
 class RecipeFilter(FilterSet):
     is_in_shopping_cart = BooleanFilter(method="filter_is_in_shopping_cart")
     is_favorited = BooleanFilter(method="filter_is_favorited")
+    cooking_time = RangeFilter()
 
     class Meta:
         model = Recipe
-        fields = ["is_in_shopping_cart", "is_favorited"]
+        fields = ["is_in_shopping_cart", "is_favorited", "cooking_time"]
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         user = self.request.user
@@ -0,0 +1,73 @@
+import csv
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.search import IngredientIndex, normalize
+from recipes.management.commands.run_import import INGREDIENTS_CSV_PATH
+
+ALPHABET = "абвгдежзийклмнопрстуфхцчшщьыэюя"
+
+
+def typo(word, rng):
+    position = rng.randrange(len(word))
+    kind = rng.choice(("delete", "replace", "swap", "insert"))
+    if kind == "delete" and len(word) > 3:
+        return word[:position] + word[position + 1:]
+    if kind == "swap" and position < len(word) - 1:
+        return (word[:position] + word[position + 1] + word[position]
+                + word[position + 2:])
+    if kind == "insert":
+        return word[:position] + rng.choice(ALPHABET) + word[position:]
+    return word[:position] + rng.choice(ALPHABET) + word[position + 1:]
+
+
+def variants(name, rng):
+    word = max(name.split(), key=len)
+    yield "prefix", name[:max(3, len(name) // 2)]
+    yield "typo", typo(name, rng)
+    if len(word) >= 6:
+        start = rng.randrange(1, len(word) - 4)
+        yield "substring", word[start:start + 4]
+
+
+class Command(BaseCommand):
+    help = ("Измеряет скорость и качество нечёткого поиска ингредиентов "
+            "на словаре из data/ingredients.csv.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--budget-ms", type=float, default=None)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        with open(INGREDIENTS_CSV_PATH, encoding="utf-8") as file:
+            names = [row[0] for row in csv.reader(file)]
+        started = time.perf_counter()
+        index = IngredientIndex(enumerate(names))
+        self.stdout.write(
+            f"Индекс: {len(names)} ингредиентов, {len(index.postings)} "
+            f"триграмм, построен за "
+            f"{(time.perf_counter() - started) * 1000:.0f} мс")
+        rng = random.Random(options["seed"])
+        results = {}
+        for pk, name in enumerate(names):
+            for kind, query in variants(normalize(name), rng):
+                started = time.perf_counter()
+                found = index.search(query, options["limit"],
+                                     options["budget_ms"])
+                elapsed = (time.perf_counter() - started) * 1000
+                top = [index.names[other] for other in found]
+                hit = pk in found or normalize(name) in top
+                results.setdefault(kind, []).append((elapsed, hit))
+        for kind, rows in results.items():
+            timings = sorted(elapsed for elapsed, _ in rows)
+            recall = sum(hit for _, hit in rows) / len(rows)
+            self.stdout.write(
+                f"{kind}: запросов {len(rows)}, "
+                f"p50 {statistics.median(timings):.2f} мс, "
+                f"p95 {timings[int(len(timings) * 0.95)]:.2f} мс, "
+                f"max {timings[-1]:.2f} мс, "
+                f"recall@{options['limit']} {recall:.1%}")
@@ -0,0 +1,76 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.throttling import TokenBucketThrottle
+
+User = get_user_model()
+
+
+def make_request(user):
+    request = Request(APIRequestFactory().get("/api/"))
+    request.user = user
+    return request
+
+
+class Command(BaseCommand):
+    help = ("Измеряет накладные расходы ограничителя запросов на один "
+            "запрос и проверяет, что при параллельных запросах корзина "
+            "не пропускает больше своей ёмкости.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20000)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--capacity", type=int, default=500)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        throttle = TokenBucketThrottle()
+        free = SimpleNamespace(action="list", throttle_costs={})
+        costly = SimpleNamespace(action="list", throttle_costs={"list": 1})
+        cases = [
+            ("без стоимости", {"user": (1, 1.0)}, free),
+            ("пропущен", {"user": (iterations * 2, 1.0)}, costly),
+            ("отклонён", {"user": (1, 0.001)}, costly),
+        ]
+        for name, buckets, view in cases:
+            request = make_request(User(pk=uuid.uuid4().int))
+            with override_settings(THROTTLE_BUCKETS=buckets):
+                throttle.allow_request(request, view)
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    throttle.allow_request(request, view)
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{name}: {elapsed / iterations * 1e6:.1f} мкс на запрос")
+        self.check_concurrency(options)
+
+    def check_concurrency(self, options):
+        capacity = options["capacity"]
+        request = make_request(AnonymousUser())
+        address = f"10.0.{uuid.uuid4().int % 250}.1"
+        request._request.META["REMOTE_ADDR"] = address
+        view = SimpleNamespace(action="list", throttle_costs={"list": 1})
+
+        def worker(_):
+            throttle = TokenBucketThrottle()
+            return sum(throttle.allow_request(request, view)
+                       for _ in range(capacity))
+
+        with override_settings(THROTTLE_BUCKETS={"anon": (capacity, 0.001)}):
+            with ThreadPoolExecutor(options["threads"]) as executor:
+                allowed = sum(executor.map(worker,
+                                           range(options["threads"])))
+        self.stdout.write(
+            f"Параллельно {options['threads']} потоков по {capacity} "
+            f"запросов: пропущено {allowed} из ёмкости {capacity}")
+        if allowed > capacity:
+            raise CommandError("Корзина пропустила больше своей ёмкости.")
@@ -0,0 +1,86 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from api.compression import CODECS, compress, compressed_responses
+from recipes.models import Ingredient, Recipe
+
+IDENTITY = "identity"
+
+
+def read_sample(path):
+    with open(path, encoding="utf-8") as file:
+        lines = [line.strip() for line in file]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def default_sample(size):
+    paths = ["/api/tags/", "/api/recipes/", "/api/recipes/?page=2",
+             "/api/recipes/?limit=20"]
+    for name in Ingredient.objects.values_list("name", flat=True)[:size]:
+        paths.append(f"/api/ingredients/?name={name[:3]}")
+    recipes = Recipe.objects.filter(is_deleted=False).values_list(
+        "pk", flat=True)[:size]
+    paths.extend(f"/api/recipes/{pk}/" for pk in recipes)
+    return paths
+
+
+def compression_time(bodies, encoding, cached):
+    seen = set()
+    started = time.process_time()
+    for content, etag in bodies:
+        if len(content) < settings.COMPRESSION_MIN_SIZE:
+            continue
+        if not cached or not etag:
+            compress(content, encoding)
+        elif etag not in seen:
+            seen.add(etag)
+            compress(content, encoding, cached=True)
+    return time.process_time() - started
+
+
+class Command(BaseCommand):
+    help = ("Проигрывает выборку GET-запросов с разными Accept-Encoding и "
+            "выводит объём ответов и процессорное время сжатия: без кэша "
+            "и с кэшем сжатых ответов по ETag.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sample", default=None,
+                            help="Файл с путями запросов, по одному в строке.")
+        parser.add_argument("--size", type=int, default=50)
+
+    def handle(self, *args, **options):
+        if options["sample"]:
+            paths = read_sample(options["sample"])
+        else:
+            paths = default_sample(options["size"])
+        if not paths:
+            raise CommandError("Выборка запросов пуста.")
+        client = Client()
+        with override_settings(ALLOWED_HOSTS=["testserver"], DEBUG=False):
+            self.replay(client, paths, IDENTITY)
+            bodies = self.replay(client, paths, IDENTITY)
+            total = sum(len(content) for content, _ in bodies)
+            self.stdout.write(f"{IDENTITY}: {total / 1024:.0f} КБ")
+            for encoding in CODECS:
+                compressed_responses.clear()
+                size = sum(len(content) for content, _ in
+                           self.replay(client, paths, encoding))
+                dynamic = compression_time(bodies, encoding, cached=False)
+                cached = compression_time(bodies, encoding, cached=True)
+                self.stdout.write(
+                    f"{encoding}: {size / 1024:.0f} КБ ({size / total:.0%}), "
+                    f"сжатие без кэша {dynamic * 1000:.1f} мс, "
+                    f"с кэшем {cached * 1000:.1f} мс")
+        self.stdout.write(f"Запросов в выборке: {len(paths)}")
+
+    def replay(self, client, paths, encoding):
+        bodies = []
+        for path in paths:
+            response = client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+            if response.status_code != 200:
+                raise CommandError(f"{path}: статус {response.status_code}")
+            bodies.append((b"".join(response), response.get("ETag")))
+        return bodies
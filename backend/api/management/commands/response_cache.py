@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import reset_response_cache_metrics, response_cache_metrics
+
+
+class Command(BaseCommand):
+    help = "Выводит статистику кэша ответов для анонимных пользователей."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true",
+                            help="Обнулить счётчики.")
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            reset_response_cache_metrics()
+            self.stdout.write("Счётчики обнулены")
+            return
+        metrics = response_cache_metrics()
+        total = sum(metrics.values())
+        self.stdout.write(
+            f"Попаданий: {metrics['hit']}, промахов: {metrics['miss']}, "
+            f"ожиданий: {metrics['wait']}")
+        if total:
+            self.stdout.write(
+                f"Доля попаданий: {metrics['hit'] / total:.1%}")
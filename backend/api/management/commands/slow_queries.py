@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from api.models import SlowQuery
+
+ORDERINGS = {
+    "total": F("total_time").desc(),
+    "max": F("max_time").desc(),
+    "calls": F("calls").desc(),
+    "avg": (F("total_time") / F("calls")).desc(),
+}
+
+
+class Command(BaseCommand):
+    help = "Выводит самые медленные SQL-запросы по представлениям."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--sort", choices=ORDERINGS, default="total")
+        parser.add_argument("--view", help="Фильтр по имени представления.")
+        parser.add_argument("--explain", action="store_true",
+                            help="Показать сохранённые планы выполнения.")
+        parser.add_argument("--reset", action="store_true",
+                            help="Очистить журнал медленных запросов.")
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(f"Удалено записей: {deleted}")
+            return
+        queryset = SlowQuery.objects.order_by(ORDERINGS[options["sort"]])
+        if options["view"]:
+            queryset = queryset.filter(view=options["view"])
+        for index, query in enumerate(queryset[:options["limit"]], start=1):
+            self.stdout.write(
+                f"{index}. {query.view} — вызовов: {query.calls}, "
+                f"всего: {query.total_time:.1f} мс, "
+                f"среднее: {query.avg_time:.1f} мс, "
+                f"максимум: {query.max_time:.1f} мс"
+            )
+            self.stdout.write(f"   [{query.fingerprint}] {query.sql}")
+            if options["explain"] and query.explain:
+                for line in query.explain.splitlines():
+                    self.stdout.write(f"     {line}")
@@ -0,0 +1,75 @@
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from api.events import Listener, hub, recipe_event, stream
+
+
+class FakeRecipe:
+    id = 1
+    author_id = 1
+    name = "soak"
+    cooking_time = 1
+
+
+class Command(BaseCommand):
+    help = ("Открывает в процессе множество SSE-подключений и измеряет "
+            "память на подключение и время доставки события.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=5000)
+        parser.add_argument("--duration", type=float, default=5,
+                            help="Сколько секунд держать подключения.")
+
+    def handle(self, *args, **options):
+        asyncio.run(self.soak(options["connections"], options["duration"]))
+
+    async def soak(self, count, duration):
+        closed = asyncio.Event()
+        delivered = []
+
+        async def receive():
+            await closed.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if b"event: recipe" in message.get("body", b""):
+                delivered.append(time.perf_counter())
+
+        hub.loop = asyncio.get_running_loop()
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        tasks = [
+            asyncio.ensure_future(stream(
+                Listener(user_id, {FakeRecipe.author_id}), receive, send))
+            for user_id in range(count)
+        ]
+        await asyncio.sleep(duration)
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0] - baseline
+        self.stdout.write(
+            f"Подключений: {len(hub)}, память: {held / 1024 ** 2:.1f} МБ, "
+            f"{held / count:.0f} байт на подключение")
+
+        started = time.perf_counter()
+        hub.dispatch(recipe_event(FakeRecipe()))
+        while len(delivered) < count:
+            await asyncio.sleep(0.001)
+        self.stdout.write(
+            f"Событие доставлено {count} подключениям за "
+            f"{(delivered[-1] - started) * 1000:.1f} мс")
+
+        closed.set()
+        await asyncio.gather(*tasks)
+        del tasks
+        await asyncio.sleep(0.1)
+        gc.collect()
+        leaked = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        self.stdout.write(
+            f"После отключения: {len(hub)} подключений, "
+            f"{leaked / 1024:.0f} КБ не освобождено")
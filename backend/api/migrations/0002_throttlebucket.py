@@ -0,0 +1,24 @@
+# Generated by Django 3.2.3 on 2026-10-19 10:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThrottleBucket',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Ключ')),
+                ('full_at', models.BigIntegerField(db_index=True, verbose_name='Заполнится к, мс')),
+            ],
+            options={
+                'verbose_name': 'корзина ограничителя',
+                'verbose_name_plural': 'Корзины ограничителя',
+            },
+        ),
+    ]
@@ -1,15 +1,25 @@
+import hashlib
+
+from django.db.models import Count, Max
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response
 
+from api.cache import patch_user_cache_headers
 from api.serializers import RecipeMiniSerializer
-from recipes.models import Recipe
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscription
+
+TRUE_VALUES = ("1", "true", "True")
 
 
 class AddRemoveMixin:
     def handle_add_remove(self, request, pk, model):
         user = request.user
-        recipe = get_object_or_404(Recipe, pk=pk)
+        recipe = get_object_or_404(Recipe, pk=pk, is_deleted=False)
 
         if request.method == "DELETE":
             try:
@@ -24,3 +34,98 @@ class AddRemoveMixin:
             serializer = RecipeMiniSerializer(recipe)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(status=status.HTTP_400_BAD_REQUEST)
+
+
+class SparseFieldsViewMixin:
+    personal_fields = ("is_favorited", "is_in_shopping_cart", "is_subscribed")
+
+    def get_query_param_set(self, name):
+        if self.request.method not in SAFE_METHODS:
+            return None
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        return {item.strip() for item in value.split(",") if item.strip()}
+
+    def get_requested_fields(self):
+        return self.get_query_param_set("fields")
+
+    def get_expanded_fields(self):
+        return self.get_query_param_set("expand")
+
+    def omits_personal_fields(self):
+        return (self.request.method in SAFE_METHODS
+                and self.request.query_params.get("shared") in TRUE_VALUES)
+
+    def wants(self, name):
+        if name in self.personal_fields and self.omits_personal_fields():
+            return False
+        requested = self.get_requested_fields()
+        return requested is None or name in requested
+
+    def expands(self, name):
+        expanded = self.get_expanded_fields()
+        return self.wants(name) and (expanded is None or name in expanded)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_requested_fields()
+        context["expand"] = self.get_expanded_fields()
+        context["shared"] = self.omits_personal_fields()
+        return context
+
+
+class ConditionalGetMixin:
+    user_state_models = (Favorite, ShoppingCart, Subscription)
+
+    def get_resource_version(self):
+        raise NotImplementedError
+
+    def is_shared_response(self):
+        return False
+
+    def get_user_state_version(self):
+        user = self.request.user
+        if not user.is_authenticated or self.is_shared_response():
+            return None
+        return [
+            tuple(model.objects.filter(user=user).aggregate(
+                count=Count("id"), last_id=Max("id")).values())
+            for model in self.user_state_models
+        ]
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        version = self.get_resource_version()
+        shared = self.is_shared_response()
+        etag = quote_etag(hashlib.sha1(repr((
+            sorted(version.items()),
+            None if shared else request.user.pk,
+            self.get_user_state_version(),
+            request.get_full_path(),
+        )).encode()).hexdigest())
+        timestamp = None
+        if version.get("last_modified"):
+            timestamp = int(version["last_modified"].timestamp())
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=(None if request.user.is_authenticated
+                           and not shared else timestamp),
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        patch_user_cache_headers(response, shared)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args,
+                                         **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args,
+                                         **kwargs)
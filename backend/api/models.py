@@ -0,0 +1,53 @@
+from django.db import models
+
+
+class ProfileReport(models.Model):
+
+    class Meta:
+        managed = False
+        verbose_name = "профиль запроса"
+        verbose_name_plural = "Профили запросов"
+
+
+class SlowQuery(models.Model):
+    fingerprint = models.CharField(max_length=40, verbose_name="Отпечаток")
+    view = models.CharField(max_length=200, verbose_name="Представление")
+    sql = models.TextField(verbose_name="Нормализованный запрос")
+    calls = models.PositiveIntegerField(default=0, verbose_name="Вызовы")
+    total_time = models.FloatField(default=0,
+                                   verbose_name="Суммарное время, мс")
+    max_time = models.FloatField(default=0,
+                                 verbose_name="Максимальное время, мс")
+    explain = models.TextField(blank=True, verbose_name="План выполнения")
+    first_seen = models.DateTimeField(auto_now_add=True,
+                                      verbose_name="Впервые")
+    last_seen = models.DateTimeField(auto_now=True, verbose_name="Последний")
+
+    class Meta:
+        verbose_name = "медленный запрос"
+        verbose_name_plural = "Медленные запросы"
+        constraints = [
+            models.UniqueConstraint(name="unique_slow_query",
+                                    fields=["fingerprint", "view"])
+        ]
+
+    @property
+    def avg_time(self):
+        return self.total_time / self.calls if self.calls else 0
+
+    def __str__(self):
+        return f"{self.view}: {self.sql[:80]}"
+
+
+class ThrottleBucket(models.Model):
+    key = models.CharField(max_length=255, primary_key=True,
+                           verbose_name="Ключ")
+    full_at = models.BigIntegerField(db_index=True,
+                                     verbose_name="Заполнится к, мс")
+
+    class Meta:
+        verbose_name = "корзина ограничителя"
+        verbose_name_plural = "Корзины ограничителя"
+
+    def __str__(self):
+        return self.key
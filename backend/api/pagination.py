@@ -1,6 +1,134 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import OperationalError, connection, transaction
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+
+def table_estimate(model):
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] > 0 else None
+
+
+def planner_estimate(queryset):
+    if connection.vendor != "postgresql":
+        return None
+    if not queryset.query.where and not queryset.query.distinct:
+        return table_estimate(queryset.model)
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def bounded_count(queryset):
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL statement_timeout = %s",
+                               [settings.ESTIMATED_COUNT_TIMEOUT_MS])
+                count = queryset.count()
+                cursor.execute("RESET statement_timeout")
+            return count
+    except OperationalError:
+        return None
+
+
+def count_cache_key(queryset):
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.sha1(repr((sql, params)).encode()).hexdigest()
+    return f"count:{digest}"
+
+
+def estimated_count(queryset):
+    key = count_cache_key(queryset)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached, True
+    estimate = planner_estimate(queryset)
+    if estimate is None or estimate < settings.ESTIMATED_COUNT_THRESHOLD:
+        return queryset.count(), False
+    count = bounded_count(queryset)
+    if count is None:
+        return estimate, True
+    cache.set(key, count, settings.ESTIMATED_COUNT_CACHE_TIMEOUT)
+    return count, False
+
+
+class EstimatedPage(Page):
+    def __init__(self, object_list, number, paginator, has_more=None):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        if self.has_more is None:
+            return super().has_next()
+        return self.has_more
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def counted(self):
+        return estimated_count(self.object_list)
+
+    @property
+    def count(self):
+        return self.counted[0]
+
+    @property
+    def count_is_estimate(self):
+        return self.counted[1]
+
+    def _get_page(self, *args, **kwargs):
+        return EstimatedPage(*args, **kwargs)
+
+    def page(self, number):
+        if not self.count_is_estimate:
+            return super().page(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("Номер страницы должен быть числом")
+        if number < 1:
+            raise EmptyPage("Номер страницы меньше 1")
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage("Страница не содержит результатов")
+        return self._get_page(rows[:self.per_page], number, self,
+                              has_more=len(rows) > self.per_page)
 
 
 class CustomPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = "limit"
+
+
+class EstimatedCountPagination(CustomPagination):
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response({
+            "count": self.page.paginator.count,
+            "count_is_estimate": self.page.paginator.count_is_estimate,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
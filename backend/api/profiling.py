@@ -0,0 +1,162 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_PARAM = "profile="
+EXPLAIN_MODE = "explain"
+STATS_LIMIT = 40
+AUTH_TABLES = ("authtoken_token",)
+
+
+def _store_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def list_reports():
+    directory = _store_dir()
+    if not directory.is_dir():
+        return []
+    reports = []
+    for path in sorted(directory.glob("*.json"), reverse=True):
+        with open(path, encoding="utf-8") as file:
+            report = json.load(file)
+        report.pop("stats", None)
+        report.pop("queries", None)
+        reports.append(report)
+    return reports
+
+
+def get_report(report_id):
+    path = _store_dir() / f"{os.path.basename(report_id)}.json"
+    if not path.is_file():
+        return None
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_report(report):
+    directory = _store_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / f"{report['id']}.json", "w",
+              encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False)
+    for path in sorted(directory.glob("*.json"))[
+            :-settings.PROFILING_MAX_REPORTS]:
+        path.unlink(missing_ok=True)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if any(table in sql for table in AUTH_TABLES):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            # Parameters are kept in memory for EXPLAIN only: reports are
+            # readable by every staff account and must not hold tokens,
+            # password hashes or emails.
+            self.queries.append({
+                "sql": sql,
+                "raw_params": None if many else params,
+                "duration_ms": (time.perf_counter() - started) * 1000,
+            })
+
+    def explain(self):
+        prefix = connection.ops.explain_query_prefix()
+        plans = {}
+        for query in self.queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith("SELECT"):
+                continue
+            if sql not in plans:
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"{prefix} {sql}",
+                                       query["raw_params"])
+                        plans[sql] = "\n".join(
+                            " ".join(str(column) for column in row)
+                            for row in cursor.fetchall()
+                        )
+                except DatabaseError as error:
+                    plans[sql] = f"EXPLAIN недоступен: {error}"
+            query["explain"] = plans[sql]
+
+
+def _profiling_requested(request):
+    return (PROFILE_HEADER in request.META
+            or PROFILE_PARAM in request.META.get("QUERY_STRING", ""))
+
+
+def _profiling_user(request):
+    try:
+        authenticated = TokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    user = authenticated[0] if authenticated else request.user
+    return user if user.is_authenticated and user.is_staff else None
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _profiling_requested(request):
+            return self.get_response(request)
+        user = _profiling_user(request)
+        if user is None:
+            return self.get_response(request)
+        return self.profile(request, user)
+
+    def profile(self, request, user):
+        mode = request.META.get(PROFILE_HEADER) or request.GET.get("profile")
+        recorder = QueryRecorder()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration_ms = (time.perf_counter() - started) * 1000
+        if mode == EXPLAIN_MODE:
+            recorder.explain()
+
+        stats_output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stats_output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(STATS_LIMIT)
+        report_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        for query in recorder.queries:
+            query.pop("raw_params")
+        save_report({
+            "id": report_id,
+            "created_at": timezone.now().isoformat(),
+            "method": request.method,
+            "path": request.get_full_path(),
+            "user": user.username,
+            "status": response.status_code,
+            "duration_ms": duration_ms,
+            "query_count": len(recorder.queries),
+            "query_time_ms": sum(q["duration_ms"] for q in recorder.queries),
+            "queries": recorder.queries,
+            "stats": stats_output.getvalue(),
+        })
+        response["X-Profile-Id"] = report_id
+        return response
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+from api.cache import REFERENCE_GENERATION_KEY, get_generation
+from recipes.models import Ingredient
+
+CANDIDATES_LIMIT = 200
+EDIT_CANDIDATES_LIMIT = 50
+PREFIX_SCORE = 3.0
+WORD_PREFIX_SCORE = 2.5
+SUBSTRING_SCORE = 2.0
+EDIT_SCORE = 1.0
+TRIGRAM_WEIGHT = 0.4
+MIN_TRIGRAM_SIMILARITY = 0.3
+
+
+def normalize(text):
+    return " ".join(text.lower().replace("ё", "е").split())
+
+
+def trigrams(text):
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def max_edits(query):
+    if len(query) <= 4:
+        return 1
+    if len(query) <= 8:
+        return 2
+    return 3
+
+
+def edit_distance(first, second, limit):
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(second) + 1)]
+    for i, first_char in enumerate(first, start=1):
+        current = [i if i <= limit else over] + [over] * len(second)
+        for j in range(max(1, i - limit), min(len(second), i + limit) + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (first_char != second[j - 1]),
+            )
+        if min(current) > limit:
+            return over
+        previous = current
+    return min(previous[-1], over)
+
+
+class IngredientIndex:
+    def __init__(self, entries):
+        self.names = {}
+        self.grams = {}
+        self.postings = defaultdict(list)
+        for pk, name in entries:
+            name = normalize(name)
+            self.names[pk] = name
+            self.grams[pk] = trigrams(name)
+            for gram in self.grams[pk]:
+                self.postings[gram].append(pk)
+
+    def score(self, query, query_grams, pk, shared, edits=True):
+        name = self.names[pk]
+        grams = self.grams[pk]
+        similarity = len(query_grams & grams) / len(query_grams | grams)
+        if name.startswith(query):
+            base = PREFIX_SCORE
+        elif any(word.startswith(query) for word in name.split()):
+            base = WORD_PREFIX_SCORE
+        elif query in name:
+            base = SUBSTRING_SCORE
+        else:
+            limit = max_edits(query)
+            # Every edit destroys at most three trigrams of the query.
+            if not edits or shared < len(query_grams) - 3 * limit:
+                distance = limit + 1
+            else:
+                distance = min(
+                    edit_distance(query, candidate, limit)
+                    for candidate in (name, name[:len(query)],
+                                      *name.split())
+                )
+            if distance <= limit:
+                base = EDIT_SCORE * (2 - distance / (limit + 1))
+            elif similarity >= MIN_TRIGRAM_SIMILARITY:
+                base = 0
+            else:
+                return None
+        return base + TRIGRAM_WEIGHT * similarity
+
+    def search(self, query, limit=None, budget_ms=None):
+        limit = limit or settings.FUZZY_SEARCH_LIMIT
+        budget_ms = budget_ms or settings.FUZZY_SEARCH_BUDGET_MS
+        deadline = time.perf_counter() + budget_ms / 1000
+        query = normalize(query)
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        counts = Counter()
+        for gram in query_grams:
+            counts.update(self.postings.get(gram, ()))
+        ranked = []
+        exact = 0
+        candidates = counts.most_common(CANDIDATES_LIMIT)
+        for position, (pk, shared) in enumerate(candidates):
+            if time.perf_counter() > deadline:
+                break
+            edits = position < EDIT_CANDIDATES_LIMIT and exact < limit
+            score = self.score(query, query_grams, pk, shared, edits)
+            if score is None:
+                continue
+            ranked.append((-score, len(self.names[pk]), pk))
+            if score >= SUBSTRING_SCORE:
+                exact += 1
+        ranked.sort()
+        return [pk for _, _, pk in ranked[:limit]]
+
+
+_index = None
+_index_generation = None
+_index_lock = threading.Lock()
+
+
+def get_ingredient_index():
+    global _index, _index_generation
+    generation = get_generation(REFERENCE_GENERATION_KEY)
+    with _index_lock:
+        if _index is None or _index_generation != generation:
+            _index = IngredientIndex(
+                Ingredient.objects.values_list("id", "name").iterator())
+            _index_generation = generation
+        return _index
@@ -1,10 +1,16 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
-from django.db import transaction
+from django.db import connection, transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
 
+from api.cache import RECIPE_GENERATION_KEY, bump_generation
 from api.fields import Base64ImageField
+from foodgram.constants import (
+    BATCH_MAX_REQUESTS,
+    RECIPE_BULK_MAX_ITEMS,
+    SUBSCRIPTION_RECIPES_MAX_LIMIT,
+)
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -13,11 +19,45 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
+from recipes.snapshots import (
+    apply_snapshot,
+    refresh_snapshot,
+    refresh_snapshots,
+)
 from users.models import Subscription
 
 User = get_user_model()
 
 
+class SparseFieldsMixin:
+    collapsed_fields = {}
+    personal_fields = ()
+
+    def is_sparse_root(self):
+        return self.root is self or self.root is self.parent
+
+    def is_expanded(self, name):
+        expand = self.context.get("expand")
+        return (not self.is_sparse_root() or expand is None
+                or name in expand)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get("shared"):
+            fields = {name: field for name, field in fields.items()
+                      if name not in self.personal_fields}
+        if not self.is_sparse_root():
+            return fields
+        requested = self.context.get("fields")
+        if requested is not None:
+            fields = {name: field for name, field in fields.items()
+                      if name in requested}
+        for name, collapsed_field in self.collapsed_fields.items():
+            if name in fields and not self.is_expanded(name):
+                fields[name] = collapsed_field()
+        return fields
+
+
 class CustomUserCreateSerializer(UserCreateSerializer):
     class Meta(UserCreateSerializer.Meta):
         model = User
@@ -26,12 +66,16 @@ class CustomUserCreateSerializer(UserCreateSerializer):
         extra_kwargs = {"password": {"write_only": True}}
 
 
-class BaseCustomUserSerializer(UserSerializer):
+class BaseCustomUserSerializer(SparseFieldsMixin, UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    personal_fields = ("is_subscribed",)
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         request = self.context.get("request")
-        if request and request.user.is_authenticated:
+        if (request and request.user.is_authenticated
+                and request.user.pk != obj.pk):
             return Subscription.objects.filter(user=request.user,
                                                author=obj).exists()
         return False
@@ -61,8 +105,6 @@ class CustomUserSerializer(BaseCustomUserSerializer):
     def update(self, instance, validated_data):
         avatar = validated_data.get('avatar', None)
         if avatar:
-            if instance.avatar:
-                instance.avatar.delete()
             instance.avatar = avatar
         return super().update(instance, validated_data)
 
@@ -70,6 +112,10 @@ class CustomUserSerializer(BaseCustomUserSerializer):
 class SubscriptionSerializer(BaseCustomUserSerializer):
     recipes_count = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
+    collapsed_fields = {
+        "recipes": lambda: serializers.SerializerMethodField(
+            method_name="get_recipe_ids"),
+    }
 
     class Meta(UserSerializer.Meta):
         model = User
@@ -85,15 +131,27 @@ class SubscriptionSerializer(BaseCustomUserSerializer):
             "recipes",
         )
 
+    def get_limited_recipes(self, obj):
+        queryset = obj.recipes.filter(is_deleted=False).order_by(
+            "-created_at", "-id")
+        try:
+            limit = int(self.context.get("recipes_limit"))
+        except (TypeError, ValueError):
+            limit = SUBSCRIPTION_RECIPES_MAX_LIMIT
+        return queryset[:max(0, min(limit, SUBSCRIPTION_RECIPES_MAX_LIMIT))]
+
     def get_recipes(self, obj):
-        queryset = obj.recipes.all()
-        limit = self.context.get("recipes_limit")
-        if limit:
-            queryset = queryset[: int(limit)]
-        return RecipeMiniSerializer(queryset, many=True).data
+        return RecipeMiniSerializer(self.get_limited_recipes(obj),
+                                    many=True).data
+
+    def get_recipe_ids(self, obj):
+        return list(
+            self.get_limited_recipes(obj).values_list("id", flat=True))
 
     def get_recipes_count(self, obj):
-        return obj.recipes.count()
+        if hasattr(obj, "recipes_count"):
+            return obj.recipes_count
+        return obj.recipes.filter(is_deleted=False).count()
 
 
 class CustomUserSetPasswordSerializer(serializers.Serializer):
@@ -132,13 +190,21 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "measurement_unit", "amount")
 
 
+class RecipeIngredientIdSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="ingredient_id")
+
+    class Meta:
+        model = RecipeIngredient
+        fields = ("id", "amount")
+
+
 class RecipeMiniSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
         fields = ("id", "name", "image", "cooking_time")
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tags = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Tag.objects.all(), required=True
     )
@@ -149,6 +215,12 @@ class RecipeSerializer(serializers.ModelSerializer):
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
     image = Base64ImageField()
+    personal_fields = ("is_favorited", "is_in_shopping_cart")
+    collapsed_fields = {
+        "author": lambda: serializers.PrimaryKeyRelatedField(read_only=True),
+        "ingredients": lambda: RecipeIngredientIdSerializer(
+            many=True, read_only=True, source="recipeingredient_set"),
+    }
 
     class Meta:
         model = Recipe
@@ -212,8 +284,10 @@ class RecipeSerializer(serializers.ModelSerializer):
         self.recipe_ingredients_create(recipe, ingredients_data)
 
         recipe.tags.set(tags_data)
+        refresh_snapshot(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags_data = validated_data.pop("tags", None)
         ingredients_data = validated_data.pop("recipeingredient_set", None)
@@ -230,15 +304,23 @@ class RecipeSerializer(serializers.ModelSerializer):
             instance.recipeingredient_set.all().delete()
             self.recipe_ingredients_create(instance, ingredients_data)
 
+        if tags_data is not None or ingredients_data is not None:
+            refresh_snapshot(instance)
         return instance
 
     def to_representation(self, instance):
+        if hasattr(instance, "author_is_subscribed"):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        apply_snapshot(instance)
         representation = super().to_representation(instance)
-        representation["tags"] = TagSerializer(instance.tags.all(),
-                                               many=True).data
+        if "tags" in representation and self.is_expanded("tags"):
+            representation["tags"] = TagSerializer(instance.tags.all(),
+                                                   many=True).data
         return representation
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, "is_favorited"):
+            return obj.is_favorited
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             return Favorite.objects.filter(user=request.user,
@@ -246,8 +328,121 @@ class RecipeSerializer(serializers.ModelSerializer):
         return False
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, "is_in_shopping_cart"):
+            return obj.is_in_shopping_cart
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             return ShoppingCart.objects.filter(user=request.user,
                                                recipe=obj).exists()
         return False
+
+
+class BulkIngredientSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    amount = serializers.IntegerField(min_value=1)
+
+
+class RecipeBulkItemSerializer(serializers.ModelSerializer):
+    tags = serializers.ListField(child=serializers.IntegerField(),
+                                 allow_empty=False)
+    ingredients = BulkIngredientSerializer(many=True, allow_empty=False)
+    image = Base64ImageField()
+
+    class Meta:
+        model = Recipe
+        fields = ("tags", "ingredients", "name", "image", "text",
+                  "cooking_time")
+
+
+class RecipeBulkCreateSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.JSONField(),
+        allow_empty=False,
+        max_length=RECIPE_BULK_MAX_ITEMS,
+    )
+
+    def validate_recipes(self, value):
+        items = {}
+        self.item_errors = {}
+        for index, data in enumerate(value):
+            serializer = RecipeBulkItemSerializer(data=data)
+            if serializer.is_valid():
+                items[index] = serializer.validated_data
+            else:
+                self.item_errors[index] = serializer.errors
+        self.check_references(items)
+        return items
+
+    def check_references(self, items):
+        tag_ids = {pk for item in items.values() for pk in item["tags"]}
+        ingredient_ids = {ingredient["id"] for item in items.values()
+                          for ingredient in item["ingredients"]}
+        known_tags = set(Tag.objects.filter(id__in=tag_ids)
+                         .values_list("id", flat=True))
+        known_ingredients = set(Ingredient.objects.filter(
+            id__in=ingredient_ids).values_list("id", flat=True))
+        for index, item in list(items.items()):
+            errors = {}
+            tags = item["tags"]
+            ingredients = [ingredient["id"]
+                           for ingredient in item["ingredients"]]
+            if len(set(tags)) != len(tags):
+                errors["tags"] = ["Тэги не должны повторяться."]
+            elif not known_tags.issuperset(tags):
+                errors["tags"] = ["Тег не существует."]
+            if len(set(ingredients)) != len(ingredients):
+                errors["ingredients"] = ["Ингредиенты не должны повторяться."]
+            elif not known_ingredients.issuperset(ingredients):
+                errors["ingredients"] = ["Ингредиент не существует."]
+            if errors:
+                self.item_errors[index] = errors
+                del items[index]
+
+    @transaction.atomic
+    def create(self, validated_data):
+        items = validated_data["recipes"]
+        author = validated_data["author"]
+        recipes = [
+            Recipe(author=author, name=item["name"], text=item["text"],
+                   cooking_time=item["cooking_time"])
+            for item in items.values()
+        ]
+        for recipe, item in zip(recipes, items.values()):
+            recipe.image.save(item["image"].name, item["image"], save=False)
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+        else:
+            for recipe in recipes:
+                recipe.save(force_insert=True)
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=recipe, ingredient_id=ingredient["id"],
+                             amount=ingredient["amount"])
+            for recipe, item in zip(recipes, items.values())
+            for ingredient in item["ingredients"]
+        ])
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe=recipe, tag_id=tag_id)
+            for recipe, item in zip(recipes, items.values())
+            for tag_id in item["tags"]
+        ])
+        refresh_snapshots(Recipe.objects.filter(
+            pk__in=[recipe.pk for recipe in recipes]))
+        transaction.on_commit(
+            lambda: bump_generation(RECIPE_GENERATION_KEY))
+        return dict(zip(items, recipes))
+
+    def to_representation(self, created):
+        return {
+            "created": [{"index": index, "id": recipe.pk}
+                        for index, recipe in created.items()],
+            "errors": [{"index": index, "errors": errors}
+                       for index, errors in sorted(self.item_errors.items())],
+        }
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = serializers.ListField(
+        child=serializers.CharField(),
+        allow_empty=False,
+        max_length=BATCH_MAX_REQUESTS,
+    )
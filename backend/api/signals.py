@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache import (
+    RECIPE_GENERATION_KEY,
+    REFERENCE_GENERATION_KEY,
+    TRENDING_GENERATION_KEY,
+    bump_generation,
+)
+from api.events import follow_event, publish_event
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from recipes.signals import AUTHOR_FIELDS
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def bump_on_commit(key):
+    transaction.on_commit(lambda: bump_generation(key))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_reference_data(sender, **kwargs):
+    bump_on_commit(REFERENCE_GENERATION_KEY)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=User)
+def invalidate_recipes(sender, **kwargs):
+    bump_on_commit(RECIPE_GENERATION_KEY)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump_on_commit(RECIPE_GENERATION_KEY)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes(sender, created, update_fields=None,
+                              **kwargs):
+    if created or (update_fields is not None
+                   and not AUTHOR_FIELDS.intersection(update_fields)):
+        return
+    bump_on_commit(RECIPE_GENERATION_KEY)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def invalidate_trending(sender, **kwargs):
+    bump_on_commit(TRENDING_GENERATION_KEY)
+
+
+@receiver(post_save, sender=Subscription)
+def publish_follow(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(
+            lambda: publish_event(follow_event(instance, True)))
+
+
+@receiver(post_delete, sender=Subscription)
+def publish_unfollow(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: publish_event(follow_event(instance, False)))
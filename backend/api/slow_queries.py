@@ -0,0 +1,108 @@
+import hashlib
+import re
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from api.models import SlowQuery
+
+UNKNOWN_VIEW = "-"
+
+_normalize_rules = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def normalize(sql):
+    for pattern, replacement in _normalize_rules:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def explain(sql, params):
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            return "\n".join(
+                " ".join(str(column) for column in row)
+                for row in cursor.fetchall()
+            )
+    except DatabaseError as error:
+        return f"EXPLAIN недоступен: {error}"
+
+
+class SlowQueryLogger:
+    def __init__(self, threshold_ms):
+        self.threshold_ms = threshold_ms
+        self.view = UNKNOWN_VIEW
+        self.samples = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= self.threshold_ms:
+                self.samples.append((sql, None if many else params,
+                                     duration_ms))
+
+    def add_call(self, lookup, duration_ms):
+        return SlowQuery.objects.filter(**lookup).update(
+            calls=F("calls") + 1,
+            total_time=F("total_time") + duration_ms,
+            max_time=Greatest(F("max_time"), duration_ms),
+        )
+
+    def record(self):
+        for sql, params, duration_ms in self.samples:
+            normalized = normalize(sql)
+            lookup = {"fingerprint": fingerprint(normalized),
+                      "view": self.view[:200]}
+            if self.add_call(lookup, duration_ms):
+                continue
+            plan = ""
+            if params is not None and sql.lstrip().upper().startswith(
+                    "SELECT"):
+                plan = explain(sql, params)
+            try:
+                with transaction.atomic():
+                    SlowQuery.objects.create(
+                        sql=normalized, calls=1, total_time=duration_ms,
+                        max_time=duration_ms, explain=plan, **lookup)
+            except IntegrityError:
+                self.add_call(lookup, duration_ms)
+        self.samples = []
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        if settings.SLOW_QUERY_THRESHOLD_MS <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        logger = SlowQueryLogger(settings.SLOW_QUERY_THRESHOLD_MS)
+        request.slow_query_logger = logger
+        with connection.execute_wrapper(logger):
+            response = self.get_response(request)
+        logger.record()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        request.slow_query_logger.view = (
+            match.view_name if match else UNKNOWN_VIEW)
@@ -0,0 +1,48 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+USER_STATE_PREFIX = "user-state"
+
+
+def user_state(user):
+    return {
+        "favorites": list(
+            Favorite.objects.filter(user=user, recipe__is_deleted=False)
+            .order_by("recipe_id").values_list("recipe_id", flat=True)),
+        "shopping_cart": list(
+            ShoppingCart.objects.filter(user=user, recipe__is_deleted=False)
+            .order_by("recipe_id").values_list("recipe_id", flat=True)),
+        "subscriptions": list(
+            Subscription.objects.filter(user=user, author__is_active=True)
+            .order_by("author_id").values_list("author_id", flat=True)),
+    }
+
+
+def state_version(state):
+    return hashlib.sha1(repr(sorted(state.items())).encode()).hexdigest()[:16]
+
+
+def state_cache_key(user, version):
+    return f"{USER_STATE_PREFIX}:{user.pk}:{version}"
+
+
+def remember_state(user, version, state):
+    cache.add(state_cache_key(user, version), state,
+              settings.USER_STATE_CACHE_TIMEOUT)
+
+
+def state_delta(user, since, state):
+    previous = cache.get(state_cache_key(user, since))
+    if previous is None:
+        return None
+    delta = {}
+    for name, ids in state.items():
+        old, new = set(previous[name]), set(ids)
+        delta[name] = {"added": sorted(new - old),
+                       "removed": sorted(old - new)}
+    return delta
@@ -0,0 +1,285 @@
+import re
+import tempfile
+import tracemalloc
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.cache import REFERENCE_GENERATION_KEY, bump_generation
+from api.models import ThrottleBucket
+from api.throttling import TokenBucketThrottle
+from api.views import RecipeViewSet
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Subscription
+
+User = get_user_model()
+
+RECIPES = 500
+INGREDIENTS = 1000
+AUTHORS = 60
+INGREDIENTS_PER_RECIPE = 10
+
+PLAN_RECIPES = 5000
+PLAN_AUTHORS = 50
+PAGE_SIZE = 6
+FULL_SCAN_RE = re.compile(r"Seq Scan|SCAN \w+$", re.MULTILINE)
+SORT_RE = re.compile(r"\bSort\b|TEMP B-TREE")
+
+
+@override_settings(
+    STATICFILES_STORAGE=(
+        "django.contrib.staticfiles.storage.StaticFilesStorage"),
+)
+class MemoryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        tag = Tag.objects.create(name="memory-budget", slug="memory-budget")
+        Ingredient.objects.bulk_create([
+            Ingredient(name=f"memory-budget-{index}", measurement_unit="г")
+            for index in range(INGREDIENTS)
+        ])
+        ingredients = list(Ingredient.objects.order_by("pk"))
+        User.objects.bulk_create([
+            User(email=f"memory-budget-{index}@example.com",
+                 username=f"memory-budget-{index}")
+            for index in range(AUTHORS)
+        ])
+        authors = list(User.objects.order_by("pk"))
+        cls.author = authors[0]
+        cls.subscriber = User.objects.create_superuser(
+            email="memory-budget@example.com", username="memory-budget",
+            password=None)
+        Recipe.objects.bulk_create([
+            Recipe(author=cls.author, name=f"Рецепт {index}",
+                   image="recipes/memory-budget.png", text="Описание",
+                   cooking_time=10)
+            for index in range(RECIPES)
+        ])
+        recipes = list(Recipe.objects.order_by("pk"))
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag.pk)
+            for recipe in recipes
+        ])
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient=ingredients[
+                    (index * INGREDIENTS_PER_RECIPE + offset)
+                    % len(ingredients)],
+                amount=offset + 1,
+            )
+            for index, recipe in enumerate(recipes)
+            for offset in range(INGREDIENTS_PER_RECIPE)
+        ])
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create([
+                model(user=cls.subscriber, recipe=recipe)
+                for recipe in recipes
+            ])
+        Subscription.objects.bulk_create([
+            Subscription(user=cls.subscriber, author=followed)
+            for followed in authors
+        ])
+        cls.token = Token.objects.create(user=cls.subscriber)
+
+    def setUp(self):
+        self.client = Client(
+            HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.admin = Client()
+        self.admin.force_login(self.subscriber)
+
+    def measure(self, client, path):
+        bump_generation(REFERENCE_GENERATION_KEY)
+        tracemalloc.start()
+        try:
+            response = client.get(path)
+            size = sum(len(chunk) for chunk in response)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(response.status_code, 200, path)
+        return peak, size
+
+    def assertWithinBudget(self, client, path, budget_kb):
+        self.measure(client, path)
+        peak, size = self.measure(client, path)
+        self.assertLessEqual(
+            peak, budget_kb * 1024,
+            f"{path}: пик {peak / 1024:.0f} КБ из {budget_kb} КБ, "
+            f"ответ {size / 1024:.0f} КБ")
+
+    def test_download_shopping_cart(self):
+        self.assertWithinBudget(
+            self.client, "/api/recipes/download_shopping_cart/", 512)
+
+    def test_ingredients(self):
+        self.assertWithinBudget(self.client, "/api/ingredients/", 256)
+
+    def test_subscriptions(self):
+        self.assertWithinBudget(
+            self.client, "/api/users/subscriptions/", 384)
+
+    def test_admin_author(self):
+        self.assertWithinBudget(
+            self.admin, f"/admin/users/customuser/{self.author.pk}/change/",
+            512)
+
+    def test_admin_subscriber(self):
+        self.assertWithinBudget(
+            self.admin,
+            f"/admin/users/customuser/{self.subscriber.pk}/change/", 512)
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create([
+            User(email=f"query-plan-{index}@example.com",
+                 username=f"query-plan-{index}")
+            for index in range(PLAN_AUTHORS)
+        ])
+        cls.authors = list(User.objects.order_by("pk"))
+        Recipe.objects.bulk_create([
+            Recipe(author=cls.authors[index % PLAN_AUTHORS],
+                   name=f"Рецепт {index}", image="recipes/query-plan.png",
+                   text="Описание", cooking_time=index % 120 + 1,
+                   trending_score=index % 97,
+                   favorites_count=index % 53)
+            for index in range(PLAN_RECIPES)
+        ], batch_size=500)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def view_queryset(self, action, params, user=None):
+        view = RecipeViewSet(action_map={"get": action}, args=(), kwargs={},
+                             format_kwarg=None)
+        request = view.initialize_request(
+            APIRequestFactory().get("/api/recipes/", params))
+        request.user = user or AnonymousUser()
+        view.request = request
+        return view.filter_queryset(view.get_queryset())
+
+    def recipe_querysets(self):
+        author = self.authors[0].pk
+        yield "по умолчанию", self.view_queryset("list", {})
+        yield "/trending/", self.view_queryset("trending", {})
+        for name in RecipeViewSet.orderings:
+            params = {"ordering": name}
+            yield name, self.view_queryset("list", params)
+            yield f"{name}, cooking_time_max", self.view_queryset(
+                "list", {**params, "cooking_time_max": 30})
+            yield f"{name}, author", self.view_queryset(
+                "list", {**params, "author": author})
+        yield "по умолчанию, авторизован", self.view_queryset(
+            "list", {}, self.authors[0])
+
+    def test_orderings_use_indexes(self):
+        for name, queryset in self.recipe_querysets():
+            with self.subTest(name):
+                plan = queryset[:PAGE_SIZE].explain()
+                self.assertFalse(
+                    FULL_SCAN_RE.search(plan) and SORT_RE.search(plan),
+                    f"{name}: полное сканирование с сортировкой\n{plan}")
+
+    def test_popularity_orders_by_favorites(self):
+        recipes = self.view_queryset("list", {"ordering": "popularity"})
+        counts = list(recipes.values_list("favorites_count", flat=True)
+                      [:PAGE_SIZE])
+        self.assertEqual(counts, [52] * PAGE_SIZE)
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="throttle@example.com", username="throttle",
+            password="pass12345xx")
+        self.request = Request(APIRequestFactory().get("/api/"))
+        self.request.user = self.user
+        self.view = SimpleNamespace(action="list",
+                                    throttle_costs={"list": 1})
+
+    def allow(self, now):
+        throttle = TokenBucketThrottle()
+        with mock.patch("api.throttling.time.time", return_value=now):
+            return throttle.allow_request(self.request, self.view), throttle
+
+    @override_settings(THROTTLE_BUCKETS={"user": (3, 1.0)})
+    def test_bucket_is_shared_between_throttles(self):
+        self.assertEqual([self.allow(100)[0] for _ in range(3)],
+                         [True] * 3)
+        allowed, throttle = self.allow(100)
+        self.assertFalse(allowed)
+        self.assertEqual(throttle.wait(), 1)
+        self.assertTrue(self.allow(101)[0])
+        self.assertFalse(self.allow(101)[0])
+
+    @override_settings(THROTTLE_BUCKETS={"user": (3, 1.0)})
+    def test_full_buckets_are_removed(self):
+        self.allow(100)
+        ThrottleBucket.objects.create(key="throttle:user:stale", full_at=0)
+        self.request.user = User(pk=self.user.pk + 1)
+        self.allow(200)
+        self.assertQuerysetEqual(
+            ThrottleBucket.objects.order_by("key").values_list(
+                "key", flat=True),
+            [f"throttle:user:{self.user.pk + 1}"])
+
+    @override_settings(THROTTLE_BUCKETS={"user": (10, 1.0)})
+    def test_rejected_request_gets_retry_after(self):
+        token = Token.objects.create(user=self.user)
+        client = Client(HTTP_AUTHORIZATION=f"Token {token.key}")
+        path = "/api/recipes/download_shopping_cart/"
+        self.assertEqual(client.get(path).status_code, 200)
+        response = client.get(path)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "10")
+
+
+IMAGE = ("data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAf"
+         "FcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg==")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class RecipeEventTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="events@example.com", username="events",
+            password="pass12345xx")
+        token = Token.objects.create(user=self.user)
+        self.client = Client(HTTP_AUTHORIZATION=f"Token {token.key}")
+        self.tag = Tag.objects.create(name="Обед", slug="lunch")
+        self.ingredient = Ingredient.objects.create(
+            name="Рис", measurement_unit="г")
+
+    def recipe(self, name):
+        return {"name": name, "text": "Текст", "cooking_time": 5,
+                "image": IMAGE, "tags": [self.tag.pk],
+                "ingredients": [{"id": self.ingredient.pk, "amount": 10}]}
+
+    def test_bulk_publishes_each_recipe(self):
+        with mock.patch("api.views.publish_event") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    "/api/recipes/bulk/",
+                    {"recipes": [self.recipe("Плов"), {"name": ""},
+                                 self.recipe("Ризотто")]},
+                    content_type="application/json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            [call.args[0]["recipe"]["name"]
+             for call in publish.call_args_list],
+            ["Плов", "Ризотто"])
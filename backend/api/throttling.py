@@ -0,0 +1,64 @@
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from rest_framework.throttling import BaseThrottle
+
+from api.models import ThrottleBucket
+
+THROTTLE_PREFIX = "throttle"
+MILLI = 1000
+
+
+def consume_tokens(key, cost, capacity, rate):
+    # The bucket row keeps the moment it will be full again, in ms. Each
+    # token in use pushes it 1 / rate seconds further, so a request is one
+    # conditional UPDATE shared by every worker and process.
+    step = int(cost * MILLI / rate)
+    burst = int(capacity * MILLI / rate)
+    buckets = ThrottleBucket.objects.filter(key=key)
+    while True:
+        now = int(time.time() * MILLI)
+        if buckets.filter(full_at__lte=now + burst - step).update(
+                full_at=Greatest(F("full_at"), now) + step):
+            return 0
+        full_at = buckets.values_list("full_at", flat=True).first()
+        if full_at is not None:
+            delay = max(full_at, now) + step - now - burst
+            if delay > 0:
+                return delay / MILLI
+            continue
+        ThrottleBucket.objects.filter(full_at__lt=now).delete()
+        try:
+            with transaction.atomic():
+                ThrottleBucket.objects.create(key=key, full_at=now + step)
+            return 0
+        except IntegrityError:
+            continue
+
+
+class TokenBucketThrottle(BaseThrottle):
+    def get_cost(self, request, view):
+        costs = getattr(view, "throttle_costs", {})
+        cost = costs.get(getattr(view, "action", None), 0)
+        return cost(request) if callable(cost) else cost
+
+    def get_scope(self, request):
+        if request.user.is_authenticated:
+            return "user", request.user.pk
+        return "anon", self.get_ident(request)
+
+    def allow_request(self, request, view):
+        cost = self.get_cost(request, view)
+        if not cost:
+            return True
+        scope, ident = self.get_scope(request)
+        capacity, rate = settings.THROTTLE_BUCKETS[scope]
+        self.delay = consume_tokens(f"{THROTTLE_PREFIX}:{scope}:{ident}",
+                                    cost, capacity, rate)
+        return not self.delay
+
+    def wait(self):
+        return self.delay
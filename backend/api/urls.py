@@ -2,6 +2,7 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from api.views import (
+    BatchView,
     CustomUserViewSet,
     IngredientViewSet,
     RecipeViewSet,
@@ -18,6 +19,7 @@ router_v1.register("recipes", RecipeViewSet, basename="recipe")
 
 v1_endpoints = [
     path("", include(router_v1.urls)),
+    path("batch/", BatchView.as_view(), name="batch"),
     path("auth/", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
 ]
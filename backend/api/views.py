@@ -1,27 +1,64 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Exists, OuterRef, Sum
-from django.http import HttpResponse
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (
+    BooleanField,
+    Case,
+    Count,
+    Exists,
+    OuterRef,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
+from djoser.conf import settings as djoser_settings
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-
+from rest_framework.views import APIView
+
+from api.batch import run_batch
+from api.cache import (
+    RECIPE_GENERATION_KEY,
+    TRENDING_GENERATION_KEY,
+    AnonymousResponseCacheMixin,
+    ReferenceDataCacheMixin,
+    bump_generation,
+    facets_cache_key,
+    get_generation,
+)
+from api.events import issue_ticket, publish_event, recipe_event
 from api.filters import RecipeFilter
-from api.mixins import AddRemoveMixin
-from api.pagination import CustomPagination
+from api.mixins import (
+    TRUE_VALUES,
+    AddRemoveMixin,
+    ConditionalGetMixin,
+    SparseFieldsViewMixin,
+)
+from api.pagination import EstimatedCountPagination
 from api.permissions import IsAuthorOrReadOnly
+from api.search import get_ingredient_index
 from api.serializers import (
+    BatchSerializer,
     CustomUserCreateSerializer,
     CustomUserSerializer,
     CustomUserSetPasswordSerializer,
     IngredientsSerializer,
+    RecipeBulkCreateSerializer,
     RecipeSerializer,
     SubscriptionSerializer,
     TagSerializer,
 )
+from api.state import remember_state, state_delta, state_version, user_state
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -30,14 +67,28 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
+from recipes.tasks import purge_recipes
 from users.models import Subscription
+from users.tasks import delete_user
 
 User = get_user_model()
 
 
-class CustomUserViewSet(UserViewSet):
+def shopping_list_lines(ingredients):
+    yield "Список покупок:\n\n".encode("utf-8")
+    for index, (name, unit, amount) in enumerate(ingredients, start=1):
+        yield f"{index}. {name} ({unit}) - {amount}\n".encode("utf-8")
+
+
+class CustomUserViewSet(SparseFieldsViewMixin, UserViewSet):
     serializer_class = CustomUserSerializer
-    pagination_class = CustomPagination
+    pagination_class = EstimatedCountPagination
+    throttle_costs = {
+        "subscriptions": lambda request: (
+            2 if request.query_params.get("recipes_limit") else 5),
+    }
+    profile_fields = ("id", "username", "first_name", "last_name", "email",
+                      "avatar")
 
     def get_permissions(self):
         if self.action in ["create", "list", "retrieve"]:
@@ -45,15 +96,44 @@ class CustomUserViewSet(UserViewSet):
         return [IsAuthenticated()]
 
     def get_queryset(self):
-        return User.objects.all().order_by("id")
+        fields = [field for field in self.profile_fields
+                  if field == "id" or self.wants(field)]
+        return self.annotate_is_subscribed(
+            User.objects.filter(is_active=True).only(*fields).order_by("id"))
+
+    def annotate_is_subscribed(self, queryset):
+        user = self.request.user
+        if not self.wants("is_subscribed"):
+            return queryset
+        if not user.is_authenticated:
+            return queryset.annotate(
+                is_subscribed=Value(False, output_field=BooleanField()))
+        return queryset.annotate(
+            is_subscribed=Exists(
+                Subscription.objects.filter(user=user,
+                                            author=OuterRef("pk"))
+            )
+        )
 
     def get_serializer_class(self):
         if self.action == "create":
             return CustomUserCreateSerializer
+        if self.action == "destroy" or (self.action == "me"
+                                        and self.request.method == "DELETE"):
+            return djoser_settings.SERIALIZERS.user_delete
         if self.action == "set_password":
             return CustomUserSetPasswordSerializer
         return CustomUserSerializer
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.is_active = False
+        instance.save(update_fields=["is_active"])
+        Recipe.objects.filter(author=instance).update(is_deleted=True)
+        transaction.on_commit(
+            lambda: bump_generation(RECIPE_GENERATION_KEY))
+        delete_user.delay(instance.pk)
+
     @action(detail=False, methods=["POST"])
     def set_password(self, request):
         serializer = self.get_serializer(data=request.data)
@@ -76,7 +156,8 @@ class CustomUserViewSet(UserViewSet):
 
         if request.method == "DELETE":
             if user.avatar:
-                user.avatar.delete(save=True)
+                user.avatar = None
+                user.save(update_fields=["avatar"])
                 return Response(status=status.HTTP_204_NO_CONTENT)
             return Response("Аватар не найден",
                             status=status.HTTP_404_NOT_FOUND)
@@ -86,13 +167,47 @@ class CustomUserViewSet(UserViewSet):
         return Response({"avatar": user.avatar.url},
                         status=status.HTTP_200_OK)
 
+    @action(
+        detail=False,
+        methods=["GET"],
+        permission_classes=[IsAuthenticated],
+        url_path="me/state",
+    )
+    def state(self, request):
+        user = request.user
+        state = user_state(user)
+        version = state_version(state)
+        etag = quote_etag(version)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            remember_state(user, version, state)
+            since = request.query_params.get("since")
+            delta = state_delta(user, since, state) if since else None
+            response = Response({"version": version,
+                                 "delta": delta is not None,
+                                 **(state if delta is None else delta)})
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @action(
+        detail=False,
+        methods=["POST"],
+        permission_classes=[IsAuthenticated],
+        url_path="me/events-ticket",
+    )
+    def events_ticket(self, request):
+        return Response({"ticket": issue_ticket(request.user),
+                         "expires_in": settings.EVENTS_TICKET_MAX_AGE},
+                        status=status.HTTP_201_CREATED)
+
     @action(
         detail=True, methods=["POST", "DELETE"],
         permission_classes=[IsAuthenticated]
     )
     def subscribe(self, request, id=None):
         user = request.user
-        author = get_object_or_404(User, id=id)
+        author = get_object_or_404(User, id=id, is_active=True)
 
         if user == author:
             return Response(
@@ -129,79 +244,213 @@ class CustomUserViewSet(UserViewSet):
             permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
         user = request.user
-        queryset = User.objects.filter(subscribed_to__user=user)
+        queryset = User.objects.filter(
+            subscribed_to__user=user, is_active=True
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        ).order_by("id")
+        if self.wants("recipes_count"):
+            queryset = queryset.annotate(recipes_count=Count(
+                "recipes", filter=Q(recipes__is_deleted=False)))
         recipes_limit = request.query_params.get("recipes_limit")
+        context = {**self.get_serializer_context(),
+                   "recipes_limit": recipes_limit}
 
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = SubscriptionSerializer(
                 page,
                 many=True,
-                context={"request": request, "recipes_limit": recipes_limit},
+                context=context,
             )
             return self.get_paginated_response(serializer.data)
         serializer = SubscriptionSerializer(
             queryset,
             many=True,
-            context={"request": request, "recipes_limit": recipes_limit},
+            context=context,
         )
         return Response(serializer.data)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ReferenceDataCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [AllowAny]
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReferenceDataCacheMixin,
+                        viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all().order_by("id")
     serializer_class = IngredientsSerializer
     permission_classes = [AllowAny]
     pagination_class = None
     search_fields = ["name"]
+    throttle_costs = {
+        "list": lambda request: 1 if request.query_params.get("name") else 0,
+    }
 
     def get_queryset(self):
         queryset = super().get_queryset()
         name = self.request.query_params.get("name")
+        if name and self.request.query_params.get("fuzzy"):
+            ids = get_ingredient_index().search(name)
+            if not ids:
+                return queryset.none()
+            return queryset.filter(pk__in=ids).order_by(Case(
+                *[When(pk=pk, then=Value(position))
+                  for position, pk in enumerate(ids)]
+            ))
         if name:
             queryset = queryset.filter(name__istartswith=name)
+        if self.action == "list":
+            return queryset[:settings.INGREDIENT_LIST_LIMIT]
         return queryset
 
 
-class RecipeViewSet(viewsets.ModelViewSet, AddRemoveMixin):
-    queryset = Recipe.objects.all().order_by("-created_at")
+class RecipeViewSet(AnonymousResponseCacheMixin, ConditionalGetMixin,
+                    SparseFieldsViewMixin, viewsets.ModelViewSet,
+                    AddRemoveMixin):
+    queryset = Recipe.objects.filter(is_deleted=False).order_by("-created_at")
+    orderings = {
+        "trending": ("-trending_score", "-id"),
+        "popularity": ("-favorites_count", "-id"),
+        "newest": ("-created_at", "-id"),
+        "cooking_time": ("cooking_time", "id"),
+        "-cooking_time": ("-cooking_time", "-id"),
+    }
+    default_ordering = ("id",)
+    throttle_costs = {"download_shopping_cart": 10}
     serializer_class = RecipeSerializer
-    pagination_class = CustomPagination
+    pagination_class = EstimatedCountPagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
     search_fields = ["tags__slug"]
 
     def get_permissions(self):
-        if self.action in ["create", "update", "partial_update", "destroy",
-                           "favorite", "download_shopping_cart",
+        if self.action in ["create", "bulk", "update", "partial_update",
+                           "destroy", "favorite", "download_shopping_cart",
                            "shopping_cart"]:
             return [IsAuthenticated(), IsAuthorOrReadOnly()]
         return [AllowAny()]
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        tags = self.request.query_params.getlist("tags")
-        author = self.request.query_params.get("author")
+        queryset = self.filter_by_params(super().get_queryset())
         user = self.request.user
         if user.is_authenticated:
+            queryset = self.annotate_user_flags(queryset, user)
+        queryset = self.prefetch_requested(queryset)
+        return queryset.order_by(*self.get_ordering())
+
+    def filter_by_params(self, queryset):
+        tags = self.request.query_params.getlist("tags")
+        author = self.request.query_params.get("author")
+        if tags:
+            queryset = queryset.filter(tags__slug__in=tags).distinct()
+        if author:
+            queryset = queryset.filter(author__id=author)
+        return queryset
+
+    def get_object(self):
+        if not hasattr(self, "_object"):
+            self._object = super().get_object()
+        return self._object
+
+    def get_resource_version(self):
+        if self.action == "retrieve":
+            return {"last_modified": self.get_object().updated_at}
+        return {"generations": [get_generation(key) for key in
+                                self.get_response_cache_generations()]}
+
+    def annotate_user_flags(self, queryset, user):
+        if self.wants("is_in_shopping_cart"):
             queryset = queryset.annotate(
                 is_in_shopping_cart=Exists(
                     ShoppingCart.objects.filter(user=user,
                                                 recipe=OuterRef("pk"))
                 )
             )
-        if tags:
-            queryset = queryset.filter(tags__slug__in=tags).distinct()
-        if author:
-            queryset = queryset.filter(author__id=author)
-        return queryset.order_by("id")
+        if self.wants("is_favorited"):
+            queryset = queryset.annotate(
+                is_favorited=Exists(
+                    Favorite.objects.filter(user=user,
+                                            recipe=OuterRef("pk"))
+                )
+            )
+        if self.expands("author") and not self.omits_personal_fields():
+            queryset = queryset.annotate(
+                author_is_subscribed=Exists(
+                    Subscription.objects.filter(user=user,
+                                                author=OuterRef("author_id"))
+                )
+            )
+        return queryset
+
+    def prefetch_requested(self, queryset):
+        if self.expands("author"):
+            queryset = queryset.select_related("author")
+        if not self.wants("tags") and not self.wants("ingredients"):
+            queryset = queryset.defer("snapshot")
+        if not self.wants("text"):
+            queryset = queryset.defer("text")
+        return queryset
+
+    def filters_by_user(self):
+        return self.request.user.is_authenticated and any(
+            self.request.query_params.get(name) in TRUE_VALUES
+            for name in ("is_favorited", "is_in_shopping_cart"))
+
+    def is_shared_response(self):
+        return self.omits_personal_fields() and not self.filters_by_user()
+
+    def get_response_cache_generations(self):
+        if self.get_ordering() in (self.orderings["trending"],
+                                   self.orderings["popularity"]):
+            return (RECIPE_GENERATION_KEY, TRENDING_GENERATION_KEY)
+        return (RECIPE_GENERATION_KEY,)
+
+    def get_ordering(self):
+        if self.action == "trending":
+            return self.orderings["trending"]
+        ordering = self.request.query_params.get("ordering")
+        return self.orderings.get(ordering, self.default_ordering)
+
+    @action(detail=False, methods=["GET"])
+    def trending(self, request):
+        return self.list(request)
+
+    @action(detail=False, methods=["GET"])
+    def facets(self, request):
+        key = facets_cache_key(request, self.filters_by_user())
+        facets = cache.get(key)
+        if facets is None:
+            recipes = Recipe.objects.filter(is_deleted=False)
+            author = request.query_params.get("author")
+            if author:
+                recipes = recipes.filter(author__id=author)
+            recipes = self.filter_queryset(recipes)
+            facets = list(
+                Tag.objects.annotate(count=Count(
+                    "recipes", filter=Q(recipes__in=recipes.values("pk"))))
+                .values("id", "name", "slug", "count")
+                .order_by("id")
+            )
+            cache.set(key, facets, settings.RESPONSE_CACHE_TIMEOUT)
+        return Response({"tags": facets})
+
+    @action(detail=False, methods=["POST"])
+    def bulk(self, request):
+        serializer = RecipeBulkCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        created = serializer.save(author=request.user)
+        for recipe in created.values():
+            transaction.on_commit(
+                lambda recipe=recipe: publish_event(recipe_event(recipe)))
+        return Response(
+            serializer.data,
+            status=(status.HTTP_201_CREATED if created
+                    else status.HTTP_400_BAD_REQUEST),
+        )
 
     @action(detail=True, methods=["GET"], url_path="get-link")
     def get_short_link(self, request, pk=None):
@@ -226,9 +475,9 @@ class RecipeViewSet(viewsets.ModelViewSet, AddRemoveMixin):
     )
     def download_shopping_cart(self, request):
         user = request.user
-        response = HttpResponse(content_type="text/plain")
-
-        shopping_cart = ShoppingCart.objects.filter(user=user).values_list(
+        shopping_cart = ShoppingCart.objects.filter(
+            user=user, recipe__is_deleted=False
+        ).values_list(
             "recipe", flat=True
         )
 
@@ -237,17 +486,13 @@ class RecipeViewSet(viewsets.ModelViewSet, AddRemoveMixin):
             .values("ingredient__name", "ingredient__measurement_unit")
             .annotate(total_amount=Sum("amount"))
             .order_by("ingredient__name")
+            .values_list("ingredient__name", "ingredient__measurement_unit",
+                         "total_amount")
+        )
+        return StreamingHttpResponse(
+            shopping_list_lines(ingredients_sum.iterator()),
+            content_type="text/plain",
         )
-
-        response.write("Список покупок:\n\n".encode("utf-8"))
-        for index, item in enumerate(ingredients_sum, start=1):
-            line = (
-                f"{index}. {item['ingredient__name']} "
-                f"({item['ingredient__measurement_unit']}) - "
-                f"{item['total_amount']}\n"
-            )
-            response.write(line.encode("utf-8"))
-        return response
 
     @action(
         detail=True,
@@ -258,9 +503,24 @@ class RecipeViewSet(viewsets.ModelViewSet, AddRemoveMixin):
         return self.handle_add_remove(request, pk, Favorite)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        recipe = serializer.save(author=self.request.user)
+        transaction.on_commit(lambda: publish_event(recipe_event(recipe)))
+
+    def perform_destroy(self, instance):
+        instance.is_deleted = True
+        instance.save(update_fields=["is_deleted"])
+        purge_recipes.delay([instance.pk])
+
+
+class BatchView(APIView):
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return run_batch(request, serializer.validated_data["requests"])
 
 
 def redirect_short_link(request, short_id):
-    recipe = get_object_or_404(Recipe, short_link=short_id)
+    recipe = get_object_or_404(Recipe, short_link=short_id, is_deleted=False)
     return redirect(f"/recipes/{recipe.id}")
@@ -1,8 +1,5 @@
-python manage.py makemigrations --no-input
-python manage.py migrate --no-input
-python manage.py run_import
-python manage.py collectstatic --no-input --clear
+python manage.py startup ${STARTUP_FORCE:+--force}
 
-cp -r /app/collected_static/. /backend_static/static/
+cp -ru /app/collected_static/. /backend_static/static/
 
-gunicorn --bind 0:8080 foodgram.wsgi
\ No newline at end of file
+exec gunicorn foodgram.wsgi
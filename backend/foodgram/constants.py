@@ -7,6 +7,20 @@ MEASUREMENT_MAX_LENGTH = 64
 TAG_MAX_LENGTH = 32
 EMAIL_MAX_LENGTH = 254
 CONFIRMATION_CODE_MAX_LENGTH = 150
+IMPORT_MODEL_MAX_LENGTH = 100
+IMPORT_PK_MAX_LENGTH = 64
 
 
 NOT_ALLOWED_USERNAME = "me"
+
+TRENDING_FAVORITE_WEIGHT = 2.0
+TRENDING_SHOPPING_CART_WEIGHT = 1.0
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_DECAY_INTERVAL_HOURS = 1
+
+RECIPE_BULK_MAX_ITEMS = 100
+SUBSCRIPTION_RECIPES_MAX_LIMIT = 50
+ADMIN_RELATED_LIMIT = 50
+
+BATCH_MAX_REQUESTS = 20
+IMPORT_LOOKUP_CHUNK_SIZE = 500
@@ -29,16 +29,20 @@ INSTALLED_APPS = [
     "api.apps.ApiConfig",
     "recipes.apps.RecipesConfig",
     "users.apps.UsersConfig",
+    "jobs.apps.JobsConfig",
 ]
 
 AUTH_USER_MODEL = "users.CustomUser"
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "api.compression.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "api.profiling.ProfilingMiddleware",
+    "api.slow_queries.SlowQueryMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -103,12 +107,22 @@ USE_TZ = True
 
 STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "collected_static"
+STATICFILES_STORAGE = (
+    "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"
+)
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+DEFAULT_FILE_STORAGE = "foodgram.storage.ContentAddressedStorage"
+
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILING_MAX_REPORTS = int(os.getenv("PROFILING_MAX_REPORTS", 50))
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 200))
+
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -117,10 +131,68 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.TokenAuthentication",
     ],
+    "DEFAULT_THROTTLE_CLASSES": ["api.throttling.TokenBucketThrottle"],
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", 1)),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "/tmp/foodgram_cache"),
+    },
+}
+
+REFERENCE_CACHE_MAX_ENTRIES = int(
+    os.getenv("REFERENCE_CACHE_MAX_ENTRIES", 512))
+REFERENCE_CACHE_MAX_AGE = int(os.getenv("REFERENCE_CACHE_MAX_AGE", 3600))
+REFERENCE_CACHE_STALE_AGE = int(os.getenv("REFERENCE_CACHE_STALE_AGE", 86400))
+
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "api.events.PostgresBackend")
+EVENTS_SOCKET_DIR = os.getenv("EVENTS_SOCKET_DIR", "/tmp/foodgram_events")
+EVENTS_HEARTBEAT = int(os.getenv("EVENTS_HEARTBEAT", 25))
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 16))
+EVENTS_TICKET_MAX_AGE = int(os.getenv("EVENTS_TICKET_MAX_AGE", 60))
+
+FUZZY_SEARCH_LIMIT = int(os.getenv("FUZZY_SEARCH_LIMIT", 20))
+FUZZY_SEARCH_BUDGET_MS = float(os.getenv("FUZZY_SEARCH_BUDGET_MS", 20))
+INGREDIENT_LIST_LIMIT = int(os.getenv("INGREDIENT_LIST_LIMIT", 100))
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_CACHE_MAX_ENTRIES = int(
+    os.getenv("COMPRESSION_CACHE_MAX_ENTRIES", 256))
+
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", 300))
+RESPONSE_CACHE_LOCK_TIMEOUT = int(os.getenv("RESPONSE_CACHE_LOCK_TIMEOUT", 10))
+USER_STATE_CACHE_TIMEOUT = int(os.getenv("USER_STATE_CACHE_TIMEOUT", 86400))
+
+THROTTLE_BUCKETS = {
+    "user": (int(os.getenv("THROTTLE_USER_CAPACITY", 60)),
+             float(os.getenv("THROTTLE_USER_RATE", 1))),
+    "anon": (int(os.getenv("THROTTLE_ANON_CAPACITY", 30)),
+             float(os.getenv("THROTTLE_ANON_RATE", 0.5))),
+}
+
+JOBS_RETRY_BACKOFF = int(os.getenv("JOBS_RETRY_BACKOFF", 10))
+JOBS_RUNNING_TIMEOUT = int(os.getenv("JOBS_RUNNING_TIMEOUT", 600))
+JOBS_RETENTION_DAYS = int(os.getenv("JOBS_RETENTION_DAYS", 7))
+JOBS_CLEANUP_INTERVAL_HOURS = int(
+    os.getenv("JOBS_CLEANUP_INTERVAL_HOURS", 24))
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", 500))
+MEDIA_COLLECT_GRACE_SECONDS = int(os.getenv("MEDIA_COLLECT_GRACE_SECONDS", 600))
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", 500))
+
+ESTIMATED_COUNT_THRESHOLD = int(os.getenv("ESTIMATED_COUNT_THRESHOLD", 10000))
+ESTIMATED_COUNT_TIMEOUT_MS = int(os.getenv("ESTIMATED_COUNT_TIMEOUT_MS", 100))
+ESTIMATED_COUNT_CACHE_TIMEOUT = int(
+    os.getenv("ESTIMATED_COUNT_CACHE_TIMEOUT", 300))
+
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", 4))
+
 DJOSER = {
     "TOKEN_MODEL": "rest_framework.authtoken.models.Token",
     "PERMISSIONS": {
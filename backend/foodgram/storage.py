@@ -0,0 +1,154 @@
+import hashlib
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db.models import FileField, signals
+from django.utils import timezone
+
+from jobs.queue import enqueue, task
+
+CHUNK_SIZE = 64 * 1024
+
+_tracked_fields = []
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def hashed_name(self, name, content):
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks(CHUNK_SIZE):
+            sha256.update(chunk)
+        digest = sha256.hexdigest()
+        directory = os.path.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], digest + ext)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            try:
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                pass
+        return super().save(name, content, max_length=max_length)
+
+    def references(self, name):
+        return sum(
+            model._base_manager.filter(**{field.attname: name}).count()
+            for model, field in _tracked_fields
+        )
+
+    def delete(self, name):
+        if name and not self.references(name):
+            super().delete(name)
+
+
+def _content_addressed_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, FileField)
+        and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+@task(priority=-1)
+def collect_media(names):
+    grace = timedelta(seconds=settings.MEDIA_COLLECT_GRACE_SECONDS)
+    cutoff = timezone.now() - grace
+    recent = []
+    for name in names:
+        if (not default_storage.exists(name)
+                or default_storage.references(name)):
+            continue
+        if default_storage.get_modified_time(name) > cutoff:
+            recent.append(name)
+        else:
+            default_storage.delete(name)
+    if recent:
+        enqueue(collect_media.task_name, [recent], priority=-1,
+                run_at=timezone.now() + grace)
+
+
+def tracked_directories():
+    return sorted({
+        field.upload_to for _, field in _tracked_fields
+        if isinstance(field.upload_to, str)
+    })
+
+
+def iter_media(directory):
+    try:
+        directories, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        yield os.path.join(directory, name)
+    for subdirectory in directories:
+        yield from iter_media(os.path.join(directory, subdirectory))
+
+
+def unreferenced(names):
+    names = set(names)
+    for model, field in _tracked_fields:
+        if not names:
+            break
+        names.difference_update(
+            model._base_manager.filter(**{f"{field.attname}__in": names})
+            .values_list(field.attname, flat=True)
+        )
+    return names
+
+
+def _remember_files(sender, instance, update_fields=None, **kwargs):
+    fields = [
+        field for field in _content_addressed_fields(sender)
+        if update_fields is None or field.attname in update_fields
+    ]
+    instance._replaced_files = []
+    if instance.pk is None or not fields:
+        return
+    previous = (
+        sender._base_manager.filter(pk=instance.pk)
+        .values_list(*[field.attname for field in fields])
+        .first()
+    )
+    if previous is None:
+        return
+    instance._replaced_files = [
+        old_name for field, old_name in zip(fields, previous)
+        if old_name and old_name != getattr(instance, field.attname).name
+    ]
+
+
+def _collect_replaced_files(sender, instance, **kwargs):
+    replaced = getattr(instance, "_replaced_files", [])
+    if replaced:
+        collect_media.delay(replaced)
+    instance._replaced_files = []
+
+
+def _collect_deleted_files(sender, instance, **kwargs):
+    names = [
+        getattr(instance, field.attname).name
+        for field in _content_addressed_fields(sender)
+    ]
+    names = [name for name in names if name]
+    if names:
+        collect_media.delay(names)
+
+
+def track_media(model):
+    fields = _content_addressed_fields(model)
+    if not fields:
+        return
+    _tracked_fields.extend((model, field) for field in fields)
+    signals.pre_save.connect(_remember_files, sender=model)
+    signals.post_save.connect(_collect_replaced_files, sender=model)
+    signals.post_delete.connect(_collect_deleted_files, sender=model)
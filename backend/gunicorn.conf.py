@@ -0,0 +1,7 @@
+import multiprocessing
+import os
+
+bind = "0:8080"
+workers = int(os.getenv("GUNICORN_WORKERS",
+                        multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("task", "status", "priority", "attempts", "run_at",
+                    "finished_at")
+    list_filter = ("status", "task")
+    search_fields = ("task",)
+    readonly_fields = ("started_at", "finished_at", "worker", "last_error",
+                       "created_at")
@@ -0,0 +1,73 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.management.commands.run_jobs import work
+from jobs.models import Job
+from jobs.queue import task
+
+BENCHMARK_TASK = "jobs.benchmark"
+
+
+@task(name=BENCHMARK_TASK)
+def benchmark_job(index):
+    return index
+
+
+class Command(BaseCommand):
+    help = ("Измеряет пропускную способность очереди: постановку задач "
+            "по одной и пачкой и выполнение пулом потоков. Выполняет "
+            "только свои задачи и удаляет их после замера.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=2000)
+        parser.add_argument("--workers", type=int, nargs="+",
+                            default=[1, 2, 4])
+
+    def handle(self, *args, **options):
+        count = options["jobs"]
+        try:
+            started = time.perf_counter()
+            for index in range(count):
+                benchmark_job.delay(index)
+            self.report("Постановка по одной", count, started)
+            Job.objects.filter(task=BENCHMARK_TASK).delete()
+            for workers in options["workers"]:
+                benchmark_job.delay_many([(index,) for index in range(count)])
+                started = time.perf_counter()
+                processed = self.run_workers(workers)
+                self.report(f"Выполнение, потоков: {workers}", processed,
+                            started)
+                done = Job.objects.filter(task=BENCHMARK_TASK,
+                                          status=Job.DONE).count()
+                if processed != count or done != count:
+                    raise CommandError(
+                        f"Выполнено {processed}, завершено {done} "
+                        f"из {count} задач")
+                Job.objects.filter(task=BENCHMARK_TASK).delete()
+            started = time.perf_counter()
+            benchmark_job.delay_many([(index,) for index in range(count)])
+            self.report("Постановка пачкой", count, started)
+        finally:
+            Job.objects.filter(task=BENCHMARK_TASK).delete()
+
+    def run_workers(self, workers):
+        results = []
+
+        def target(name):
+            results.append(work(name, 0.01, True, tasks=[BENCHMARK_TASK]))
+
+        threads = [threading.Thread(target=target, args=(f"benchmark:{i}",))
+                   for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(results)
+
+    def report(self, name, count, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{name}: {count} задач за {elapsed:.2f} с "
+            f"({count / elapsed:.0f} задач/с)")
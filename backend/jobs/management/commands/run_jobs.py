@@ -0,0 +1,107 @@
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import (
+    DatabaseError,
+    close_old_connections,
+    connection,
+    connections,
+)
+
+from jobs.queue import autodiscover, run_next
+
+logger = logging.getLogger(__name__)
+
+
+def work(worker, poll_interval, burst, stop_event=None, tasks=None):
+    processed = 0
+    try:
+        while stop_event is None or not stop_event.is_set():
+            close_old_connections()
+            try:
+                if run_next(worker, tasks):
+                    processed += 1
+                    continue
+            except DatabaseError:
+                logger.exception("Ошибка базы данных в обработчике %s",
+                                 worker)
+            else:
+                if burst:
+                    break
+            time.sleep(poll_interval)
+    finally:
+        connection.close()
+    return processed
+
+
+class Command(BaseCommand):
+    help = "Запускает обработчики фоновых задач."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--mode", choices=("thread", "process"),
+                            default="thread")
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Завершиться, когда очередь опустеет.",
+        )
+        parser.add_argument(
+            "--task",
+            action="append",
+            dest="tasks",
+            help="Выполнять только задачи с этим именем.",
+        )
+
+    def handle(self, *args, **options):
+        autodiscover()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        names = [f"{prefix}:{index}" for index in range(options["workers"])]
+        started = time.perf_counter()
+        if options["mode"] == "process":
+            processed = self.run_processes(names, options)
+        else:
+            processed = self.run_threads(names, options)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Выполнено задач: {processed} за {elapsed:.2f} с "
+            f"({processed / elapsed:.1f} задач/с)"
+        )
+
+    def run_processes(self, names, options):
+        connections.close_all()
+        with multiprocessing.Pool(len(names)) as pool:
+            return sum(pool.starmap(
+                work,
+                [(name, options["poll_interval"], options["burst"], None,
+                  options["tasks"])
+                 for name in names],
+            ))
+
+    def run_threads(self, names, options):
+        stop_event = threading.Event()
+        results = []
+
+        def target(name):
+            results.append(work(name, options["poll_interval"],
+                                options["burst"], stop_event,
+                                options["tasks"]))
+
+        threads = [threading.Thread(target=target, args=(name,))
+                   for name in names]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            stop_event.set()
+            for thread in threads:
+                thread.join()
+        return sum(results)
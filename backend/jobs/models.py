@@ -0,0 +1,52 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (FAILED, "Ошибка"),
+    )
+
+    task = models.CharField(max_length=200, verbose_name="Задача")
+    args = models.JSONField(default=list, blank=True,
+                            verbose_name="Аргументы")
+    kwargs = models.JSONField(default=dict, blank=True,
+                              verbose_name="Именованные аргументы")
+    status = models.CharField(max_length=16, choices=STATUSES,
+                              default=QUEUED, verbose_name="Статус")
+    priority = models.SmallIntegerField(default=0, verbose_name="Приоритет")
+    attempts = models.PositiveSmallIntegerField(default=0,
+                                                verbose_name="Попытки")
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3, verbose_name="Максимум попыток")
+    run_at = models.DateTimeField(default=timezone.now,
+                                  verbose_name="Запустить после")
+    started_at = models.DateTimeField(null=True, blank=True,
+                                      verbose_name="Начало")
+    finished_at = models.DateTimeField(null=True, blank=True,
+                                       verbose_name="Окончание")
+    worker = models.CharField(max_length=100, blank=True,
+                              verbose_name="Обработчик")
+    last_error = models.TextField(blank=True, verbose_name="Ошибка")
+    created_at = models.DateTimeField(auto_now_add=True,
+                                      verbose_name="Создана")
+
+    class Meta:
+        verbose_name = "задача"
+        verbose_name_plural = "Задачи"
+        indexes = [
+            models.Index(name="job_claim_idx",
+                         fields=["status", "-priority", "run_at", "id"]),
+            models.Index(name="job_finished_idx",
+                         fields=["status", "finished_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
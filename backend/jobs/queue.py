@@ -0,0 +1,154 @@
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(priority=0, max_attempts=3, name=None):
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        _registry[task_name] = func
+
+        def delay(*args, **kwargs):
+            return enqueue(task_name, args, kwargs, priority=priority,
+                           max_attempts=max_attempts)
+
+        def delay_many(calls):
+            return enqueue_many(task_name, calls, priority=priority,
+                                max_attempts=max_attempts)
+
+        func.task_name = task_name
+        func.delay = delay
+        func.delay_many = delay_many
+        return func
+
+    return decorator
+
+
+def autodiscover():
+    autodiscover_modules("tasks")
+
+
+def enqueue(task_name, args=(), kwargs=None, priority=0, max_attempts=3,
+            run_at=None):
+    return Job.objects.create(
+        task=task_name,
+        args=list(args),
+        kwargs=kwargs or {},
+        priority=priority,
+        max_attempts=max_attempts,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def enqueue_many(task_name, calls, priority=0, max_attempts=3):
+    now = timezone.now()
+    return Job.objects.bulk_create([
+        Job(task=task_name, args=list(args), kwargs={}, priority=priority,
+            max_attempts=max_attempts, run_at=now)
+        for args in calls
+    ])
+
+
+def retry_delay(attempts):
+    return timedelta(
+        seconds=settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1))
+
+
+def claim(worker, tasks=None):
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOBS_RUNNING_TIMEOUT)
+    jobs = Job.objects.select_for_update(skip_locked=True)
+    if tasks:
+        jobs = jobs.filter(task__in=tasks)
+    with transaction.atomic():
+        job = (
+            jobs.filter(Q(status=Job.QUEUED, run_at__lte=now)
+                        | Q(status=Job.RUNNING, started_at__lt=stale))
+            .order_by("-priority", "run_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.started_at = now
+        job.worker = worker
+        job.save(update_fields=["status", "attempts", "started_at",
+                                "worker"])
+    return job
+
+
+def heartbeat(job, stop_event):
+    try:
+        while not stop_event.wait(settings.JOBS_RUNNING_TIMEOUT / 3):
+            Job.objects.filter(
+                pk=job.pk, status=Job.RUNNING, attempts=job.attempts,
+            ).update(started_at=timezone.now())
+    finally:
+        connection.close()
+
+
+def execute(job):
+    func = _registry.get(job.task)
+    stop_event = threading.Event()
+    beat = threading.Thread(target=heartbeat, args=(job, stop_event),
+                            daemon=True)
+    beat.start()
+    try:
+        if func is None:
+            raise LookupError(f"Задача {job.task} не зарегистрирована")
+        func(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception("Задача %s завершилась с ошибкой", job)
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = Job.DONE
+        job.finished_at = timezone.now()
+    finally:
+        stop_event.set()
+        beat.join()
+    updated = Job.objects.filter(pk=job.pk, attempts=job.attempts).update(
+        status=job.status, run_at=job.run_at, finished_at=job.finished_at,
+        last_error=job.last_error)
+    if not updated:
+        logger.warning("Задача %s уже перезапущена другим обработчиком", job)
+    return job
+
+
+def delete_finished(before):
+    finished = Job.objects.filter(status__in=(Job.DONE, Job.FAILED),
+                                  finished_at__lt=before)
+    deleted = 0
+    while True:
+        ids = list(finished.values_list("pk", flat=True)
+                   [:settings.PURGE_BATCH_SIZE])
+        if not ids:
+            return deleted
+        deleted += Job.objects.filter(pk__in=ids).delete()[0]
+
+
+def run_next(worker, tasks=None):
+    job = claim(worker, tasks)
+    if job is None:
+        return False
+    execute(job)
+    return True
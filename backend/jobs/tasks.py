@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import delete_finished, enqueue, task
+
+
+def schedule_job_cleanup(now):
+    queued = Job.objects.filter(task=cleanup_jobs.task_name,
+                                status=Job.QUEUED)
+    if not queued.exists():
+        enqueue(cleanup_jobs.task_name, priority=-1,
+                run_at=now + timedelta(
+                    hours=settings.JOBS_CLEANUP_INTERVAL_HOURS))
+
+
+def ensure_job_cleanup():
+    pending = Job.objects.filter(task=cleanup_jobs.task_name,
+                                 status__in=(Job.QUEUED, Job.RUNNING))
+    if not pending.exists():
+        schedule_job_cleanup(timezone.now())
+
+
+@task(priority=-1)
+def cleanup_jobs():
+    now = timezone.now()
+    delete_finished(now - timedelta(days=settings.JOBS_RETENTION_DAYS))
+    schedule_job_cleanup(now)
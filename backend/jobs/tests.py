@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import claim, enqueue, execute, run_next, task
+from jobs.tasks import cleanup_jobs, ensure_job_cleanup
+
+calls = []
+
+
+@task(name="jobs.tests.record")
+def record(value):
+    calls.append(value)
+
+
+@task(name="jobs.tests.fail")
+def fail():
+    raise RuntimeError("Ошибка задачи")
+
+
+@override_settings(JOBS_RETRY_BACKOFF=10, JOBS_RUNNING_TIMEOUT=600)
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_order(self):
+        now = timezone.now()
+        later = enqueue(record.task_name, ["later"],
+                        run_at=now + timedelta(hours=1))
+        low = enqueue(record.task_name, ["low"], priority=-1)
+        high = enqueue(record.task_name, ["high"], priority=1)
+        self.assertEqual(claim("a"), high)
+        self.assertEqual(claim("a"), low)
+        self.assertIsNone(claim("a"))
+        later.refresh_from_db()
+        self.assertEqual((later.status, later.attempts), (Job.QUEUED, 0))
+
+    def test_claim_filters_tasks(self):
+        enqueue(fail.task_name)
+        job = enqueue(record.task_name, ["only"])
+        self.assertEqual(claim("a", tasks=[record.task_name]), job)
+        self.assertIsNone(claim("a", tasks=[record.task_name]))
+
+    def test_run_next_marks_done(self):
+        job = enqueue(record.task_name, ["done"])
+        self.assertTrue(run_next("a"))
+        job.refresh_from_db()
+        self.assertEqual(calls, ["done"])
+        self.assertEqual((job.status, job.attempts, job.worker),
+                         (Job.DONE, 1, "a"))
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(run_next("a"))
+
+    def test_failed_job_is_retried_with_backoff(self):
+        job = enqueue(fail.task_name, max_attempts=2)
+        started = timezone.now()
+        with self.assertLogs("jobs.queue", "ERROR"):
+            run_next("a")
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn("Ошибка задачи", job.last_error)
+        self.assertGreaterEqual(job.run_at, started + timedelta(seconds=10))
+        self.assertIsNone(claim("a"))
+        Job.objects.filter(pk=job.pk).update(run_at=started)
+        with self.assertLogs("jobs.queue", "ERROR"):
+            run_next("a")
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_stale_job_is_reclaimed_and_fenced(self):
+        job = enqueue(record.task_name, ["stale"])
+        stale = claim("a")
+        Job.objects.filter(pk=job.pk).update(
+            started_at=timezone.now() - timedelta(seconds=601))
+        current = claim("b")
+        self.assertEqual((current.pk, current.attempts), (job.pk, 2))
+        with self.assertLogs("jobs.queue", "WARNING"):
+            execute(stale)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.worker),
+                         (Job.RUNNING, 2, "b"))
+        execute(current)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+
+
+@override_settings(JOBS_RETENTION_DAYS=7)
+class CleanupTests(TestCase):
+    def finished(self, status, days):
+        return Job.objects.create(
+            task=record.task_name, status=status,
+            finished_at=timezone.now() - timedelta(days=days))
+
+    def test_old_finished_jobs_are_deleted(self):
+        kept = [self.finished(Job.DONE, 1), self.finished(Job.FAILED, 6),
+                Job.objects.create(task=record.task_name)]
+        self.finished(Job.DONE, 8)
+        self.finished(Job.FAILED, 30)
+        cleanup_jobs()
+        self.assertQuerysetEqual(
+            Job.objects.exclude(task=cleanup_jobs.task_name).order_by("pk"),
+            kept)
+        self.assertEqual(
+            Job.objects.filter(task=cleanup_jobs.task_name,
+                               status=Job.QUEUED).count(), 1)
+
+    def test_single_cleanup_chain(self):
+        ensure_job_cleanup()
+        ensure_job_cleanup()
+        cleanup_jobs()
+        self.assertEqual(
+            Job.objects.filter(task=cleanup_jobs.task_name).count(), 1)
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.db import models
 from django.forms import CheckboxSelectMultiple
 
+from api.pagination import EstimatedCountPaginator
 from recipes.models import (
     Favorite,
     Ingredient,
@@ -10,6 +11,7 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
+from recipes.snapshots import refresh_snapshot
 
 
 class RecipeIngredientInline(admin.TabularInline):
@@ -19,6 +21,8 @@ class RecipeIngredientInline(admin.TabularInline):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = (
         "name",
         "author",
@@ -31,6 +35,7 @@ class RecipeAdmin(admin.ModelAdmin):
     ]
     list_filter = [
         "tags",
+        "is_deleted",
     ]
     inlines = [RecipeIngredientInline]
     fieldsets = (
@@ -58,6 +63,10 @@ class RecipeAdmin(admin.ModelAdmin):
         models.ManyToManyField: {"widget": CheckboxSelectMultiple},
     }
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        refresh_snapshot(form.instance)
+
     def favorite_count(self, obj):
         return Favorite.objects.filter(recipe=obj).count()
 
@@ -90,9 +99,13 @@ class TagAdmin(admin.ModelAdmin):
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ("user", "recipe")
 
 
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ("user", "recipe")
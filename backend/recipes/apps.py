@@ -5,3 +5,10 @@ class RecipesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "recipes"
     verbose_name = "рецепты"
+
+    def ready(self):
+        from foodgram.storage import track_media
+        from recipes import signals  # noqa: F401
+        from recipes.models import Recipe
+
+        track_media(Recipe)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from foodgram import constants
+from recipes.tasks import decay_factor, decay_scores
+
+
+class Command(BaseCommand):
+    help = ("Уменьшает рейтинг популярности рецептов за --interval-hours. "
+            "В обычной работе рейтинг затухает задачей decay_trending, "
+            "которую ставит в очередь команда startup.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval-hours", type=float, default=1)
+        parser.add_argument("--half-life-hours", type=float,
+                            default=constants.TRENDING_HALF_LIFE_HOURS)
+
+    def handle(self, *args, **options):
+        factor = decay_factor(options["interval_hours"],
+                              options["half_life_hours"])
+        decayed = decay_scores(factor)
+        self.stdout.write(
+            f"Рейтинг обновлён у {decayed} рецептов (×{factor:.4f})")
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from recipes.transfer import Progress, export_graph
+
+
+class Command(BaseCommand):
+    help = ("Выгружает пользователей, теги, ингредиенты, рецепты и связи "
+            "между ними в формате NDJSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output",
+            nargs="?",
+            default="-",
+            help="Файл для выгрузки, по умолчанию стандартный вывод.",
+        )
+        parser.add_argument(
+            "--with-media",
+            action="store_true",
+            help="Встроить изображения и аватары в выгрузку.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Сколько строк читать из базы за один запрос.",
+        )
+
+    def handle(self, *args, **options):
+        progress = Progress(self.stderr.write)
+        if options["output"] == "-":
+            export_graph(sys.stdout, progress, options["chunk_size"],
+                         options["with_media"])
+            return
+        with open(options["output"], "w", encoding="utf-8") as stream:
+            export_graph(stream, progress, options["chunk_size"],
+                         options["with_media"])
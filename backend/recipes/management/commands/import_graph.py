@@ -0,0 +1,56 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.snapshots import refresh_snapshots
+from recipes.tasks import refresh_favorites_counts
+from recipes.transfer import GraphImporter, ImportState, Progress
+
+
+class Command(BaseCommand):
+    help = ("Загружает выгрузку export_graph. Прогресс сохраняется в базе "
+            "в одной транзакции с каждой пачкой, повторный запуск "
+            "продолжает с места остановки.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="Файл NDJSON для загрузки.")
+        parser.add_argument(
+            "--source",
+            help=("Имя загрузки для сохранения прогресса, по умолчанию "
+                  "полный путь к файлу."),
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Игнорировать сохранённый прогресс и начать заново.",
+        )
+        parser.add_argument(
+            "--without-media",
+            action="store_true",
+            help="Не сохранять встроенные в выгрузку файлы.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Сколько строк вставлять за одну транзакцию.",
+        )
+
+    def handle(self, *args, **options):
+        state = ImportState(options["source"]
+                            or os.path.abspath(options["input"]))
+        if options["restart"]:
+            state.reset()
+        state.load()
+        if state.line:
+            self.stderr.write(f"Продолжение со строки {state.line + 1}")
+        importer = GraphImporter(state, Progress(self.stderr.write),
+                                 options["batch_size"],
+                                 not options["without_media"])
+        with open(options["input"], encoding="utf-8") as stream:
+            importer.run(stream)
+        refreshed = refresh_snapshots(
+            Recipe.objects.filter(snapshot__isnull=True))
+        self.stderr.write(f"Обновлено снимков рецептов: {refreshed}")
+        refresh_favorites_counts(Recipe.objects.all())
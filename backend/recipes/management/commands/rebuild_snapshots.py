@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import Recipe
+from recipes.snapshots import refresh_snapshots, stale_snapshots
+
+
+class Command(BaseCommand):
+    help = ("Пересобирает снимки тегов и ингредиентов рецептов и проверяет, "
+            "что они совпадают с данными в таблицах.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify-only", action="store_true",
+                            help="Только проверить, ничего не записывая.")
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.all()
+        if not options["verify_only"]:
+            started = time.perf_counter()
+            refreshed = refresh_snapshots(recipes)
+            self.stdout.write(
+                f"Пересобрано снимков: {refreshed} за "
+                f"{time.perf_counter() - started:.2f} с")
+        stale = list(stale_snapshots(recipes))
+        if stale:
+            shown = ", ".join(map(str, stale[:20]))
+            raise CommandError(
+                f"Устаревших снимков: {len(stale)} (рецепты {shown})")
+        self.stdout.write("Все снимки совпадают с данными.")
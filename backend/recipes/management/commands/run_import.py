@@ -4,6 +4,8 @@ from django.core.management.base import BaseCommand
 
 from recipes.models import Ingredient
 
+INGREDIENTS_CSV_PATH = '../data/ingredients.csv'
+
 
 class Command(BaseCommand):
 
@@ -16,7 +18,6 @@ class Command(BaseCommand):
             Ingredient.objects.bulk_create(ingredients_to_create)
 
     def handle(self, *args, **kwargs):
-        csv_file_path = '../data/ingredients.csv'
-        with open(csv_file_path, 'r', encoding="utf-8") as file:
+        with open(INGREDIENTS_CSV_PATH, 'r', encoding="utf-8") as file:
             csv_reader = csv.reader(file)
             self.ingredients(csv_reader)
@@ -0,0 +1,95 @@
+import hashlib
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+
+from jobs.tasks import ensure_job_cleanup
+from recipes.management.commands.run_import import INGREDIENTS_CSV_PATH
+from recipes.tasks import ensure_trending_decay
+
+CHECKSUM_TABLE = "startup_checksum"
+
+
+def pending_migrations():
+    executor = MigrationExecutor(connection)
+    targets = executor.loader.graph.leaf_nodes()
+    return [migration for migration, _ in executor.migration_plan(targets)]
+
+
+def data_checksum():
+    sha256 = hashlib.sha256()
+    with open(INGREDIENTS_CSV_PATH, "rb") as file:
+        for chunk in iter(lambda: file.read(64 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class Command(BaseCommand):
+    help = ("Применяет неприменённые миграции и импортирует данные только "
+            "если изменились исходные данные.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Выполнить все шаги независимо от контрольных сумм.",
+        )
+
+    def read_checksums(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {CHECKSUM_TABLE} ("
+                "name varchar(32) PRIMARY KEY, "
+                "checksum varchar(64) NOT NULL)"
+            )
+            cursor.execute(f"SELECT name, checksum FROM {CHECKSUM_TABLE}")
+            return dict(cursor.fetchall())
+
+    @transaction.atomic
+    def write_checksum(self, name, checksum):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {CHECKSUM_TABLE} WHERE name = %s", [name])
+            cursor.execute(
+                f"INSERT INTO {CHECKSUM_TABLE} (name, checksum) "
+                "VALUES (%s, %s)",
+                [name, checksum],
+            )
+
+    def migrate(self, force):
+        started = time.perf_counter()
+        pending = pending_migrations()
+        if not force and not pending:
+            self.stdout.write("schema: без изменений, пропущено")
+            return
+        call_command("migrate", interactive=False, verbosity=0)
+        self.stdout.write(
+            f"schema: применено миграций {len(pending)} "
+            f"за {time.perf_counter() - started:.2f} с")
+
+    def import_data(self):
+        call_command("run_import")
+
+    def run_step(self, name, checksum, stored, force, step):
+        started = time.perf_counter()
+        if not force and stored.get(name) == checksum:
+            self.stdout.write(f"{name}: без изменений, пропущено")
+            return
+        step()
+        self.write_checksum(name, checksum)
+        self.stdout.write(
+            f"{name}: выполнено за {time.perf_counter() - started:.2f} с")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        stored = self.read_checksums()
+        self.migrate(options["force"])
+        self.run_step("data", data_checksum(), stored, options["force"],
+                      self.import_data)
+        ensure_trending_decay()
+        ensure_job_cleanup()
+        self.stdout.write(
+            f"Подготовка завершена за {time.perf_counter() - started:.2f} с")
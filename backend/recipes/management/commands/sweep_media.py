@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from foodgram.storage import iter_media, tracked_directories, unreferenced
+
+
+class Command(BaseCommand):
+    help = ("Удаляет медиафайлы, на которые не ссылается ни одна запись. "
+            "Файлы моложе --min-age-hours не трогает: их запись может "
+            "быть ещё не сохранена.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--min-age-hours", type=float, default=24)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["min_age_hours"])
+        self.found = self.size = self.scanned = 0
+        for directory in tracked_directories():
+            batch = []
+            for name in iter_media(directory):
+                self.scanned += 1
+                batch.append(name)
+                if len(batch) >= options["batch_size"]:
+                    self.sweep(batch, cutoff, options["dry_run"])
+                    batch = []
+            self.sweep(batch, cutoff, options["dry_run"])
+        action = "Найдено" if options["dry_run"] else "Удалено"
+        self.stdout.write(
+            f"Просмотрено файлов: {self.scanned}. {action} без ссылок: "
+            f"{self.found} ({self.size / 1024 / 1024:.1f} МБ)")
+
+    def sweep(self, names, cutoff, dry_run):
+        for name in sorted(unreferenced(names)):
+            if default_storage.get_modified_time(name) > cutoff:
+                continue
+            self.found += 1
+            self.size += default_storage.size(name)
+            if dry_run:
+                self.stdout.write(name)
+            else:
+                default_storage.delete(name)
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.3 on 2026-10-19 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_favorite_shoppingcart_created_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportedObject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=256, verbose_name='Источник')),
+                ('model', models.CharField(max_length=100, verbose_name='Модель')),
+                ('old_pk', models.CharField(max_length=64, verbose_name='Идентификатор в выгрузке')),
+                ('new_pk', models.BigIntegerField(verbose_name='Идентификатор в базе')),
+            ],
+            options={
+                'verbose_name': 'загруженный объект',
+                'verbose_name_plural': 'Загруженные объекты',
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=256, unique=True, verbose_name='Источник')),
+                ('line', models.PositiveIntegerField(default=0, verbose_name='Последняя загруженная строка')),
+            ],
+            options={
+                'verbose_name': 'прогресс загрузки',
+                'verbose_name_plural': 'Прогресс загрузки',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='importedobject',
+            constraint=models.UniqueConstraint(fields=('source', 'model', 'old_pk'), name='unique_imported_object'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def build_snapshots(apps, recipe_ids):
+    Recipe = apps.get_model("recipes", "Recipe")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+    snapshots = {pk: {"tags": [], "ingredients": []} for pk in recipe_ids}
+    tags = (
+        Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+        .order_by("tag_id")
+        .values_list("recipe_id", "tag_id", "tag__name", "tag__slug")
+    )
+    for recipe_id, pk, name, slug in tags:
+        snapshots[recipe_id]["tags"].append(
+            {"id": pk, "name": name, "slug": slug})
+    ingredients = (
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .order_by("id")
+        .values_list("recipe_id", "ingredient_id", "ingredient__name",
+                     "ingredient__measurement_unit", "amount")
+    )
+    for recipe_id, pk, name, unit, amount in ingredients:
+        snapshots[recipe_id]["ingredients"].append(
+            {"id": pk, "name": name, "measurement_unit": unit,
+             "amount": amount})
+    return snapshots
+
+
+def backfill_snapshots(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    last_pk = 0
+    while True:
+        batch = list(
+            Recipe.objects.filter(snapshot__isnull=True, pk__gt=last_pk)
+            .order_by("pk").values_list("pk", flat=True)[:BATCH_SIZE])
+        if not batch:
+            return
+        Recipe.objects.bulk_update(
+            [Recipe(pk=pk, snapshot=snapshot)
+             for pk, snapshot in build_snapshots(apps, batch).items()],
+            ["snapshot"],
+        )
+        last_pk = batch[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_import_progress'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.3 on 2026-10-19 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_favorites_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingDecay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('decayed_at', models.DateTimeField(verbose_name='Последнее затухание')),
+            ],
+            options={
+                'verbose_name': 'затухание рейтинга',
+                'verbose_name_plural': 'Затухание рейтинга',
+            },
+        ),
+    ]
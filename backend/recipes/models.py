@@ -83,6 +83,26 @@ class Recipe(models.Model):
         verbose_name="Короткая ссылка",
     )
     created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name="Дата изменения")
+    trending_score = models.FloatField(
+        default=0,
+        verbose_name="Популярность",
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="В избранном",
+    )
+    is_deleted = models.BooleanField(
+        default=False,
+        verbose_name="Удалён",
+    )
+    snapshot = models.JSONField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Снимок тегов и ингредиентов",
+    )
 
     def get_or_create_short_link(self):
         if not self.short_link:
@@ -93,6 +113,18 @@ class Recipe(models.Model):
     class Meta:
         verbose_name = "рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            models.Index(name="recipe_trending_idx",
+                         fields=["-trending_score", "-id"]),
+            models.Index(name="recipe_created_idx",
+                         fields=["-created_at", "-id"]),
+            models.Index(name="recipe_author_created_idx",
+                         fields=["author", "-created_at", "-id"]),
+            models.Index(name="recipe_cooking_time_idx",
+                         fields=["cooking_time", "id"]),
+            models.Index(name="recipe_favorites_idx",
+                         fields=["-favorites_count", "-id"]),
+        ]
 
     def __str__(self):
         return self.name
@@ -141,6 +173,8 @@ class Favorite(models.Model):
         related_name="favorited_by",
         verbose_name="Рецепт",
     )
+    created_at = models.DateTimeField(default=timezone.now,
+                                      verbose_name="Дата добавления")
 
     class Meta:
         verbose_name = "избранное"
@@ -167,6 +201,8 @@ class ShoppingCart(models.Model):
         related_name="in_shopping_cart",
         verbose_name="Рецепт",
     )
+    created_at = models.DateTimeField(default=timezone.now,
+                                      verbose_name="Дата добавления")
 
     class Meta:
         verbose_name = "Список покупок"
@@ -178,3 +214,56 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f"{self.recipe.name} в корзине у {self.user.username}"
+
+
+class ImportProgress(models.Model):
+    source = models.CharField(
+        max_length=constants.NAME_MAX_LENGTH, unique=True,
+        verbose_name="Источник"
+    )
+    line = models.PositiveIntegerField(
+        default=0, verbose_name="Последняя загруженная строка"
+    )
+
+    class Meta:
+        verbose_name = "прогресс загрузки"
+        verbose_name_plural = "Прогресс загрузки"
+
+    def __str__(self):
+        return f"{self.source}: {self.line}"
+
+
+class ImportedObject(models.Model):
+    source = models.CharField(
+        max_length=constants.NAME_MAX_LENGTH, verbose_name="Источник"
+    )
+    model = models.CharField(
+        max_length=constants.IMPORT_MODEL_MAX_LENGTH, verbose_name="Модель"
+    )
+    old_pk = models.CharField(
+        max_length=constants.IMPORT_PK_MAX_LENGTH,
+        verbose_name="Идентификатор в выгрузке"
+    )
+    new_pk = models.BigIntegerField(verbose_name="Идентификатор в базе")
+
+    class Meta:
+        verbose_name = "загруженный объект"
+        verbose_name_plural = "Загруженные объекты"
+        constraints = [
+            models.UniqueConstraint(name="unique_imported_object",
+                                    fields=["source", "model", "old_pk"])
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.old_pk} → {self.new_pk}"
+
+
+class TrendingDecay(models.Model):
+    decayed_at = models.DateTimeField(verbose_name="Последнее затухание")
+
+    class Meta:
+        verbose_name = "затухание рейтинга"
+        verbose_name_plural = "Затухание рейтинга"
+
+    def __str__(self):
+        return f"Затухание на {self.decayed_at:%d.%m.%Y %H:%M}"
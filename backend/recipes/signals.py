@@ -0,0 +1,131 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from foodgram import constants
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from recipes.snapshots import refresh_snapshots
+from recipes.tasks import decay_factor
+
+User = get_user_model()
+
+TRENDING_WEIGHTS = {
+    Favorite: constants.TRENDING_FAVORITE_WEIGHT,
+    ShoppingCart: constants.TRENDING_SHOPPING_CART_WEIGHT,
+}
+AUTHOR_FIELDS = {"username", "first_name", "last_name", "email", "avatar"}
+
+
+def touch_recipes(queryset):
+    queryset.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def increase_trending_score(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).update(
+            trending_score=F("trending_score") + TRENDING_WEIGHTS[sender])
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def decrease_trending_score(sender, instance, **kwargs):
+    age = timezone.now() - instance.created_at
+    weight = TRENDING_WEIGHTS[sender] * decay_factor(
+        age.total_seconds() / 3600)
+    Recipe.objects.filter(pk=instance.recipe_id).update(
+        trending_score=Greatest(F("trending_score") - weight, 0.0))
+
+
+@receiver(post_save, sender=Favorite)
+def increase_favorites_count(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).update(
+            favorites_count=F("favorites_count") + 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def decrease_favorites_count(sender, instance, **kwargs):
+    Recipe.objects.filter(pk=instance.recipe_id).update(
+        favorites_count=Greatest(F("favorites_count") - 1, 0))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def touch_recipe_ingredients(sender, instance, **kwargs):
+    touch_recipes(Recipe.objects.filter(pk=instance.recipe_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def touch_recipe_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse and action in ("post_add", "post_remove", "post_clear"):
+        touch_recipes(Recipe.objects.filter(pk=instance.pk))
+    elif reverse and action in ("post_add", "post_remove"):
+        touch_recipes(Recipe.objects.filter(pk__in=pk_set))
+    elif reverse and action == "pre_clear":
+        touch_recipes(Recipe.objects.filter(tags=instance))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_tag_recipes(sender, instance, created=False, **kwargs):
+    if not created:
+        touch_recipes(Recipe.objects.filter(tags=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+def touch_ingredient_recipes(sender, instance, created, **kwargs):
+    if not created:
+        touch_recipes(Recipe.objects.filter(ingredients=instance))
+
+
+def snapshot_recipes(instance):
+    if isinstance(instance, Tag):
+        return Recipe.objects.filter(tags=instance)
+    return Recipe.objects.filter(ingredients=instance)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def refresh_renamed_snapshots(sender, instance, created, **kwargs):
+    if not created:
+        refresh_snapshots(snapshot_recipes(instance))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_snapshot_recipes(sender, instance, **kwargs):
+    instance._snapshot_recipe_ids = list(
+        snapshot_recipes(instance).values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def refresh_deleted_snapshots(sender, instance, **kwargs):
+    refresh_snapshots(
+        Recipe.objects.filter(pk__in=instance._snapshot_recipe_ids))
+
+
+@receiver(post_save, sender=User)
+def touch_author_recipes(sender, instance, created, update_fields=None,
+                         **kwargs):
+    if created or (update_fields is not None
+                   and not AUTHOR_FIELDS.intersection(update_fields)):
+        return
+    touch_recipes(Recipe.objects.filter(author=instance))
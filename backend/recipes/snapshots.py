@@ -0,0 +1,91 @@
+from django.conf import settings
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+
+SNAPSHOT_RELATIONS = ("recipeingredient_set", "tags")
+
+
+def build_snapshots(recipe_ids):
+    snapshots = {pk: {"tags": [], "ingredients": []} for pk in recipe_ids}
+    tags = (
+        Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+        .order_by("tag_id")
+        .values_list("recipe_id", "tag_id", "tag__name", "tag__slug")
+    )
+    for recipe_id, pk, name, slug in tags:
+        snapshots[recipe_id]["tags"].append(
+            {"id": pk, "name": name, "slug": slug})
+    ingredients = (
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .order_by("id")
+        .values_list("recipe_id", "ingredient_id", "ingredient__name",
+                     "ingredient__measurement_unit", "amount")
+    )
+    for recipe_id, pk, name, unit, amount in ingredients:
+        snapshots[recipe_id]["ingredients"].append(
+            {"id": pk, "name": name, "measurement_unit": unit,
+             "amount": amount})
+    return snapshots
+
+
+def iter_batches(queryset):
+    batch = []
+    for pk in queryset.order_by("pk").values_list("pk", flat=True).iterator():
+        batch.append(pk)
+        if len(batch) >= settings.SNAPSHOT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def refresh_snapshots(queryset):
+    refreshed = 0
+    for batch in iter_batches(queryset):
+        Recipe.objects.bulk_update(
+            [Recipe(pk=pk, snapshot=snapshot)
+             for pk, snapshot in build_snapshots(batch).items()],
+            ["snapshot"],
+        )
+        refreshed += len(batch)
+    return refreshed
+
+
+def refresh_snapshot(recipe):
+    recipe.snapshot = build_snapshots([recipe.pk])[recipe.pk]
+    Recipe.objects.filter(pk=recipe.pk).update(snapshot=recipe.snapshot)
+
+
+def stale_snapshots(queryset):
+    for batch in iter_batches(queryset):
+        stored = dict(Recipe.objects.filter(pk__in=batch)
+                      .values_list("pk", "snapshot"))
+        for pk, snapshot in build_snapshots(batch).items():
+            if stored[pk] != snapshot:
+                yield pk
+
+
+def apply_snapshot(recipe):
+    if "snapshot" in recipe.get_deferred_fields() or recipe.snapshot is None:
+        return
+    cache = recipe.__dict__.setdefault("_prefetched_objects_cache", {})
+    if any(name in cache for name in SNAPSHOT_RELATIONS):
+        return
+    related = {
+        "recipeingredient_set": [
+            RecipeIngredient(
+                recipe_id=recipe.pk,
+                ingredient=Ingredient(id=item["id"], name=item["name"],
+                                      measurement_unit=item[
+                                          "measurement_unit"]),
+                amount=item["amount"],
+            )
+            for item in recipe.snapshot["ingredients"]
+        ],
+        "tags": [Tag(**item) for item in recipe.snapshot["tags"]],
+    }
+    for name, objects in related.items():
+        queryset = getattr(recipe, name).all()
+        queryset._result_cache = objects
+        queryset._prefetch_done = True
+        cache[name] = queryset
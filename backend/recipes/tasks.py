@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from foodgram import constants
+from foodgram.storage import collect_media
+from jobs.models import Job
+from jobs.queue import enqueue, task
+from recipes.models import (
+    Favorite,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    TrendingDecay,
+)
+
+MIN_TRENDING_SCORE = 0.01
+
+
+def delete_in_batches(queryset, before_delete=None):
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)
+                   [:settings.PURGE_BATCH_SIZE])
+        if not ids:
+            return deleted
+        batch = queryset.model._base_manager.filter(pk__in=ids)
+        with transaction.atomic():
+            if before_delete is not None:
+                before_delete(batch)
+            deleted += batch._raw_delete(batch.db)
+
+
+def uncount_favorites(favorites):
+    # Raw deletes send no post_delete, so the counter kept by the signal
+    # handler is adjusted in the same transaction instead.
+    Recipe.objects.filter(pk__in=favorites.values("recipe_id")).update(
+        favorites_count=Greatest(F("favorites_count") - 1, 0))
+
+
+def purge(recipe_ids):
+    for model in (RecipeIngredient, Recipe.tags.through, Favorite,
+                  ShoppingCart):
+        delete_in_batches(model.objects.filter(recipe_id__in=recipe_ids))
+    recipes = Recipe.objects.filter(pk__in=recipe_ids)
+    names = [name for name in recipes.values_list("image", flat=True)
+             if name]
+    with transaction.atomic():
+        recipes._raw_delete(recipes.db)
+        if names:
+            collect_media.delay(names)
+
+
+@task(priority=-1)
+def purge_recipes(recipe_ids):
+    purge(list(Recipe.objects.filter(pk__in=recipe_ids, is_deleted=True)
+               .values_list("pk", flat=True)))
+
+
+def refresh_favorites_counts(queryset):
+    counts = (Favorite.objects.filter(recipe=OuterRef("pk"))
+              .order_by().values("recipe").annotate(count=Count("id"))
+              .values("count"))
+    return queryset.update(
+        favorites_count=Coalesce(Subquery(counts), Value(0)))
+
+
+def decay_factor(hours, half_life=constants.TRENDING_HALF_LIFE_HOURS):
+    return 0.5 ** (hours / half_life)
+
+
+def decay_scores(factor):
+    scored = Recipe.objects.filter(trending_score__gt=0)
+    scored.filter(trending_score__lt=MIN_TRENDING_SCORE / factor).update(
+        trending_score=0)
+    return scored.update(trending_score=F("trending_score") * factor)
+
+
+def schedule_trending_decay(now):
+    queued = Job.objects.filter(task=decay_trending.task_name,
+                                status=Job.QUEUED)
+    if not queued.exists():
+        enqueue(decay_trending.task_name, priority=-1,
+                run_at=now + timedelta(
+                    hours=constants.TRENDING_DECAY_INTERVAL_HOURS))
+
+
+def ensure_trending_decay():
+    pending = Job.objects.filter(task=decay_trending.task_name,
+                                 status__in=(Job.QUEUED, Job.RUNNING))
+    if not pending.exists():
+        schedule_trending_decay(timezone.now())
+
+
+@task(priority=-1)
+def decay_trending(since=None):
+    # Scores decay from the stored moment of the last decay, so a job
+    # rerun after a crash or a second chain only decays the time elapsed
+    # since then; a chain that finds another run queued ends here.
+    with transaction.atomic():
+        state, _ = TrendingDecay.objects.select_for_update().get_or_create(
+            pk=1, defaults={"decayed_at": parse_datetime(since)
+                            if since else timezone.now()})
+        now = timezone.now()
+        hours = (now - state.decayed_at).total_seconds() / 3600
+        if hours > 0:
+            decay_scores(decay_factor(hours))
+            state.decayed_at = now
+            state.save(update_fields=["decayed_at"])
+        schedule_trending_decay(now)
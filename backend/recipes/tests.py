@@ -0,0 +1,172 @@
+import io
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from api.cache import RECIPE_GENERATION_KEY, REFERENCE_GENERATION_KEY
+from foodgram import constants
+from jobs.models import Job
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+    TrendingDecay,
+)
+from recipes.tasks import (
+    decay_trending,
+    ensure_trending_decay,
+    refresh_favorites_counts,
+)
+from recipes.transfer import GraphImporter, ImportState, Progress, export_graph
+from users.tasks import delete_user
+
+User = get_user_model()
+
+
+class GraphTransferTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            email="author@example.com", username="author",
+            first_name="Автор", last_name="Авторов", password="pass12345xx")
+        self.tag = Tag.objects.create(name="Завтрак", slug="breakfast")
+        self.ingredient = Ingredient.objects.create(
+            name="Соль", measurement_unit="г")
+        self.live = self.create_recipe("Каша", is_deleted=False)
+        self.deleted = self.create_recipe("Омлет", is_deleted=True)
+
+    def create_recipe(self, name, is_deleted):
+        recipe = Recipe.objects.create(
+            author=self.author, name=name, text="Текст", cooking_time=5,
+            image="recipes/image.png", is_deleted=is_deleted)
+        recipe.tags.add(self.tag)
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=self.ingredient, amount=1)
+        Favorite.objects.create(user=self.author, recipe=recipe)
+        ShoppingCart.objects.create(user=self.author, recipe=recipe)
+        return recipe
+
+    def export(self):
+        stream = io.StringIO()
+        export_graph(stream, Progress(lambda message: None))
+        return stream.getvalue()
+
+    def test_export_skips_deleted_recipes(self):
+        records = [json.loads(line) for line in self.export().splitlines()]
+        recipes = {record["pk"] for record in records
+                   if record["model"] == "recipes.recipe"}
+        related = {record["fields"]["recipe_id"] for record in records
+                   if "recipe_id" in record["fields"]}
+        self.assertEqual(recipes, {self.live.pk})
+        self.assertEqual(related, {self.live.pk})
+
+    def test_import_does_not_revive_deleted_recipes(self):
+        dump = self.export()
+        Recipe.objects.all().delete()
+        importer = GraphImporter(ImportState("test"),
+                                 Progress(lambda message: None),
+                                 with_media=False)
+        importer.run(io.StringIO(dump))
+        self.assertQuerysetEqual(
+            Recipe.objects.values_list("name", "is_deleted"),
+            [("Каша", False)], transform=tuple)
+        recipe = Recipe.objects.get()
+        self.assertEqual(list(recipe.tags.all()), [self.tag])
+        self.assertTrue(Favorite.objects.filter(recipe=recipe).exists())
+        self.assertTrue(ShoppingCart.objects.filter(recipe=recipe).exists())
+
+    def test_import_bumps_cache_generations(self):
+        dump = self.export()
+        Tag.objects.all().delete()
+        importer = GraphImporter(ImportState("test"),
+                                 Progress(lambda message: None),
+                                 with_media=False)
+        with mock.patch("recipes.transfer.bump_generation") as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                importer.run(io.StringIO(dump))
+        bumped = {call.args[0] for call in bump.call_args_list}
+        self.assertEqual(bumped,
+                         {RECIPE_GENERATION_KEY, REFERENCE_GENERATION_KEY})
+
+
+class FavoritesCountTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            email="author@example.com", username="author",
+            password="pass12345xx")
+        self.reader = User.objects.create_user(
+            email="reader@example.com", username="reader",
+            password="pass12345xx")
+        self.recipe = Recipe.objects.create(
+            author=self.author, name="Каша", text="Текст", cooking_time=5,
+            image="recipes/image.png")
+
+    def favorites_count(self):
+        self.recipe.refresh_from_db(fields=["favorites_count"])
+        return self.recipe.favorites_count
+
+    def test_signals_track_favorites(self):
+        favorite = Favorite.objects.create(user=self.reader,
+                                           recipe=self.recipe)
+        Favorite.objects.create(user=self.author, recipe=self.recipe)
+        self.assertEqual(self.favorites_count(), 2)
+        favorite.delete()
+        self.assertEqual(self.favorites_count(), 1)
+
+    def test_deleted_user_favorites_are_uncounted(self):
+        Favorite.objects.create(user=self.reader, recipe=self.recipe)
+        Favorite.objects.create(user=self.author, recipe=self.recipe)
+        User.objects.filter(pk=self.reader.pk).update(is_active=False)
+        delete_user(self.reader.pk)
+        self.assertEqual(self.favorites_count(), 1)
+
+    def test_refresh_recounts_favorites(self):
+        Favorite.objects.bulk_create([
+            Favorite(user=user, recipe=self.recipe)
+            for user in (self.author, self.reader)
+        ])
+        self.assertEqual(self.favorites_count(), 0)
+        refresh_favorites_counts(Recipe.objects.all())
+        self.assertEqual(self.favorites_count(), 2)
+
+
+class TrendingDecayTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(
+            email="author@example.com", username="author",
+            password="pass12345xx")
+        self.recipe = Recipe.objects.create(
+            author=author, name="Каша", text="Текст", cooking_time=5,
+            image="recipes/image.png", trending_score=8)
+        TrendingDecay.objects.create(
+            pk=1, decayed_at=timezone.now() - timedelta(
+                hours=constants.TRENDING_HALF_LIFE_HOURS))
+
+    def trending_score(self):
+        self.recipe.refresh_from_db(fields=["trending_score"])
+        return self.recipe.trending_score
+
+    def queued(self):
+        return Job.objects.filter(task=decay_trending.task_name,
+                                  status=Job.QUEUED).count()
+
+    def test_rerun_does_not_decay_twice(self):
+        since = (timezone.now() - timedelta(hours=1)).isoformat()
+        decay_trending(since)
+        self.assertAlmostEqual(self.trending_score(), 4, places=3)
+        decay_trending(since)
+        self.assertAlmostEqual(self.trending_score(), 4, places=3)
+        self.assertEqual(self.queued(), 1)
+
+    def test_second_chain_is_merged(self):
+        ensure_trending_decay()
+        ensure_trending_decay()
+        self.assertEqual(self.queued(), 1)
+        decay_trending()
+        self.assertEqual(self.queued(), 1)
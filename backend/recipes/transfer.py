@@ -0,0 +1,287 @@
+import base64
+import json
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from api.cache import (
+    RECIPE_GENERATION_KEY,
+    REFERENCE_GENERATION_KEY,
+    bump_generation,
+)
+from foodgram.constants import IMPORT_LOOKUP_CHUNK_SIZE
+from recipes.models import (
+    Favorite,
+    ImportedObject,
+    ImportProgress,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Subscription
+
+User = get_user_model()
+
+
+class Node:
+    def __init__(self, model, fields, foreign_keys=None, natural_key=None,
+                 media=(), filters=None):
+        self.model = model
+        self.label = model._meta.label_lower
+        self.fields = fields
+        self.foreign_keys = foreign_keys or {}
+        self.natural_key = natural_key
+        self.media = media
+        self.filters = filters or {}
+
+    def get_queryset(self):
+        return self.model._default_manager.filter(**self.filters)
+
+    @property
+    def is_leaf(self):
+        return self.natural_key is None and self.model is not Recipe
+
+
+GRAPH = [
+    Node(User, ["email", "username", "first_name", "last_name", "password",
+                "avatar", "is_active", "date_joined"],
+         natural_key=("email",), media=("avatar",)),
+    Node(Tag, ["name", "slug"], natural_key=("slug",)),
+    Node(Ingredient, ["name", "measurement_unit"],
+         natural_key=("name", "measurement_unit")),
+    Node(Recipe, ["author_id", "name", "image", "text", "cooking_time",
+                  "created_at"],
+         foreign_keys={"author_id": User}, media=("image",),
+         filters={"is_deleted": False}),
+    Node(Recipe.tags.through, ["recipe_id", "tag_id"],
+         foreign_keys={"recipe_id": Recipe, "tag_id": Tag},
+         filters={"recipe__is_deleted": False}),
+    Node(RecipeIngredient, ["recipe_id", "ingredient_id", "amount"],
+         foreign_keys={"recipe_id": Recipe, "ingredient_id": Ingredient},
+         filters={"recipe__is_deleted": False}),
+    Node(Favorite, ["user_id", "recipe_id", "created_at"],
+         foreign_keys={"user_id": User, "recipe_id": Recipe},
+         filters={"recipe__is_deleted": False}),
+    Node(ShoppingCart, ["user_id", "recipe_id", "created_at"],
+         foreign_keys={"user_id": User, "recipe_id": Recipe},
+         filters={"recipe__is_deleted": False}),
+    Node(Subscription, ["user_id", "author_id"],
+         foreign_keys={"user_id": User, "author_id": User}),
+]
+NODES = {node.label: node for node in GRAPH}
+
+
+class Progress:
+    def __init__(self, write):
+        self.write = write
+        self.started = time.perf_counter()
+        self.section_started = self.started
+        self.section = None
+        self.section_rows = 0
+        self.total_rows = 0
+
+    def start(self, label):
+        self.finish()
+        self.section = label
+        self.section_rows = 0
+        self.section_started = time.perf_counter()
+
+    def add(self, rows=1):
+        self.section_rows += rows
+        self.total_rows += rows
+
+    def finish(self):
+        if self.section is None:
+            return
+        elapsed = max(time.perf_counter() - self.section_started, 1e-9)
+        self.write(f"{self.section}: {self.section_rows} строк, "
+                   f"{self.section_rows / elapsed:.0f} строк/с")
+        self.section = None
+
+    def summary(self):
+        self.finish()
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        self.write(f"Всего: {self.total_rows} строк за {elapsed:.2f} с, "
+                   f"{self.total_rows / elapsed:.0f} строк/с")
+
+
+def export_graph(stream, progress, chunk_size=2000, with_media=False):
+    for node in GRAPH:
+        progress.start(node.label)
+        rows = (node.get_queryset().order_by("pk")
+                .values_list("pk", *node.fields)
+                .iterator(chunk_size=chunk_size))
+        for pk, *values in rows:
+            record = {"model": node.label, "pk": pk,
+                      "fields": dict(zip(node.fields, values))}
+            if with_media:
+                media = read_media(record["fields"], node.media)
+                if media:
+                    record["media"] = media
+            stream.write(json.dumps(record, cls=DjangoJSONEncoder,
+                                    ensure_ascii=False))
+            stream.write("\n")
+            progress.add()
+    progress.summary()
+
+
+def read_media(fields, media_fields):
+    media = {}
+    for field in media_fields:
+        name = fields.get(field)
+        if name and default_storage.exists(name):
+            with default_storage.open(name) as file:
+                media[field] = base64.b64encode(file.read()).decode()
+    return media
+
+
+class ImportState:
+    def __init__(self, source):
+        self.source = source
+        self.line = 0
+        self.maps = {node.label: {} for node in GRAPH}
+
+    def reset(self):
+        ImportProgress.objects.filter(source=self.source).delete()
+        ImportedObject.objects.filter(source=self.source).delete()
+
+    def load(self):
+        progress = ImportProgress.objects.filter(source=self.source).first()
+        if progress is None:
+            return
+        self.line = progress.line
+        rows = (ImportedObject.objects.filter(source=self.source)
+                .values_list("model", "old_pk", "new_pk")
+                .iterator(chunk_size=IMPORT_LOOKUP_CHUNK_SIZE))
+        for label, old, new in rows:
+            self.maps[label][old] = new
+
+    def commit(self, line, label, pairs):
+        # Called inside the batch transaction: the rows, their id mapping
+        # and the resume position are committed or rolled back together.
+        ImportedObject.objects.bulk_create(
+            [ImportedObject(source=self.source, model=label, old_pk=old,
+                            new_pk=new) for old, new in pairs],
+            batch_size=IMPORT_LOOKUP_CHUNK_SIZE)
+        ImportProgress.objects.update_or_create(
+            source=self.source, defaults={"line": line})
+        self.line = line
+        self.maps[label].update(pairs)
+
+
+class GraphImporter:
+    def __init__(self, state, progress, batch_size=1000, with_media=True):
+        self.state = state
+        self.progress = progress
+        self.batch_size = batch_size
+        self.with_media = with_media
+        self.node = None
+        self.batch = []
+        self.line = state.line
+
+    def run(self, stream):
+        for number, line in enumerate(stream, start=1):
+            if number <= self.state.line or not line.strip():
+                continue
+            record = json.loads(line)
+            node = NODES[record["model"]]
+            if node is not self.node:
+                self.flush()
+                self.node = node
+                self.progress.start(node.label)
+            self.line = number
+            self.batch.append(record)
+            if len(self.batch) >= self.batch_size:
+                self.flush()
+        self.flush()
+        self.progress.summary()
+
+    def remap(self, record):
+        fields = dict(record["fields"])
+        for field, model in self.node.foreign_keys.items():
+            new_pk = self.state.maps[model._meta.label_lower].get(
+                str(fields[field]))
+            if new_pk is None:
+                return None
+            fields[field] = new_pk
+        if self.with_media:
+            for field, content in record.get("media", {}).items():
+                model_field = self.node.model._meta.get_field(field)
+                name = model_field.generate_filename(
+                    None, os.path.basename(fields[field]))
+                fields[field] = default_storage.save(
+                    name, ContentFile(base64.b64decode(content)))
+        return fields
+
+    def flush(self):
+        if not self.batch:
+            return
+        rows = [(str(record["pk"]), self.remap(record))
+                for record in self.batch]
+        rows = [(old_pk, fields) for old_pk, fields in rows
+                if fields is not None]
+        with transaction.atomic():
+            pairs = self.insert(rows)
+            self.state.commit(self.line, self.node.label, pairs)
+            # bulk_create sends no signals, so the cache generations the
+            # signal handlers maintain are bumped here.
+            for key in self.generation_keys():
+                transaction.on_commit(
+                    lambda key=key: bump_generation(key))
+        self.progress.add(len(self.batch))
+        self.batch = []
+
+    def generation_keys(self):
+        if self.node.model in (Tag, Ingredient):
+            return (REFERENCE_GENERATION_KEY, RECIPE_GENERATION_KEY)
+        return (RECIPE_GENERATION_KEY,)
+
+    def insert(self, rows):
+        model = self.node.model
+        if self.node.is_leaf:
+            model.objects.bulk_create(
+                [model(**fields) for _, fields in rows],
+                ignore_conflicts=True)
+            return []
+        pairs = []
+        if self.node.natural_key:
+            existing = self.find_existing([fields for _, fields in rows])
+            pending = []
+            for old_pk, fields in rows:
+                key = tuple(fields[name] for name in self.node.natural_key)
+                if key in existing:
+                    pairs.append((old_pk, existing[key]))
+                else:
+                    pending.append((old_pk, fields))
+            rows = pending
+        objects = [model(**fields) for _, fields in rows]
+        if connection.features.can_return_rows_from_bulk_insert:
+            model.objects.bulk_create(objects)
+        else:
+            for obj in objects:
+                obj.save(force_insert=True)
+        pairs.extend((old_pk, obj.pk)
+                     for (old_pk, _), obj in zip(rows, objects))
+        return pairs
+
+    def find_existing(self, rows):
+        names = self.node.natural_key
+        keys = {tuple(fields[name] for name in names) for fields in rows}
+        values = sorted({key[0] for key in keys})
+        existing = {}
+        for start in range(0, len(values), IMPORT_LOOKUP_CHUNK_SIZE):
+            chunk = values[start:start + IMPORT_LOOKUP_CHUNK_SIZE]
+            found = (self.node.model._default_manager
+                     .filter(**{f"{names[0]}__in": chunk})
+                     .values_list(*names, "pk"))
+            for *key, pk in found:
+                if tuple(key) in keys:
+                    existing[tuple(key)] = pk
+        return existing
@@ -1,15 +1,19 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from django.contrib.contenttypes.models import ContentType
 from django.urls import reverse
+from django.utils.html import format_html, format_html_join
 from django.utils.safestring import mark_safe
 
+from api.pagination import EstimatedCountPaginator
+from foodgram.constants import ADMIN_RELATED_LIMIT
 from recipes.models import Favorite, Recipe
 from users.models import CustomUser, Subscription
 
 
 @admin.register(CustomUser)
 class CustomUserAdmin(UserAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ("email", "username", "is_active",
                     "is_staff", "is_superuser")
     search_fields = ("email", "username")
@@ -45,62 +49,47 @@ class CustomUserAdmin(UserAdmin):
     readonly_fields = ("get_subscriptions", "get_recipes",
                        "get_favorited_recipes")
 
-    def get_subscriptions(self, obj):
-        custom_user_ct = ContentType.objects.get_for_model(CustomUser)
-        app_label = custom_user_ct.app_label
-        model_name = custom_user_ct.model
+    def related_links(self, queryset, change_url, changelist_url, lookup,
+                      obj, empty):
+        items = list(queryset[:ADMIN_RELATED_LIMIT + 1])
+        if not items:
+            return empty
+        links = format_html_join(
+            mark_safe("<br>"), '<a href="{}">{}</a>',
+            ((reverse(change_url, args=[pk]), name)
+             for pk, name in items[:ADMIN_RELATED_LIMIT]),
+        )
+        if len(items) > ADMIN_RELATED_LIMIT:
+            links = format_html(
+                '{}<br><a href="{}?{}={}">Показать все</a>', links,
+                reverse(changelist_url), lookup, obj.pk)
+        return links
 
-        subscriptions = Subscription.objects.filter(user=obj)
-        if subscriptions.exists():
-            return mark_safe(
-                "<br>".join([
-                    f'''<a href="{
-                    reverse(f"admin:{app_label}_{model_name}_change",
-                            args=[sub.author.id])
-                    }">'''
-                    f"{sub.author.username}</a>"
-                    for sub in subscriptions
-                ])
-            )
-        return "Нет подписок"
+    def get_subscriptions(self, obj):
+        return self.related_links(
+            Subscription.objects.filter(user=obj)
+            .values_list("author_id", "author__username"),
+            "admin:users_customuser_change",
+            "admin:users_subscription_changelist", "user__id__exact",
+            obj, "Нет подписок",
+        )
 
     def get_recipes(self, obj):
-        recipe_ct = ContentType.objects.get_for_model(Recipe)
-        app_label = recipe_ct.app_label
-        model_name = recipe_ct.model
-
-        recipes = Recipe.objects.filter(author=obj)
-        if recipes.exists():
-            return mark_safe(
-                "<br>".join([
-                    f'''<a href="{
-                    reverse(f"admin:{app_label}_{model_name}_change",
-                            args=[recipe.id])
-                    }">'''
-                    f"{recipe.name}</a>"
-                    for recipe in recipes
-                ])
-            )
-        return "Нет рецептов"
+        return self.related_links(
+            Recipe.objects.filter(author=obj).values_list("id", "name"),
+            "admin:recipes_recipe_change",
+            "admin:recipes_recipe_changelist", "author__id__exact",
+            obj, "Нет рецептов",
+        )
 
     def get_favorited_recipes(self, obj):
-        recipe_ct = ContentType.objects.get_for_model(Favorite)
-        app_label = recipe_ct.app_label
-        model_name = recipe_ct.model
-
-        favorited_recipes = Favorite.objects.filter(user=obj)
-        if favorited_recipes.exists():
-            return mark_safe(
-                "<br>".join([
-                    f'''<a href="{
-                    reverse(f"admin:{app_label}_{model_name}_change",
-                            args=[favorited_recipe.id])
-                    }">'''
-                    f"{favorited_recipe.recipe.name}</a>"
-                    for favorited_recipe in favorited_recipes
-                ])
-            )
-        return "Нет избранных рецептов"
+        return self.related_links(
+            Favorite.objects.filter(user=obj)
+            .values_list("id", "recipe__name"),
+            "admin:recipes_favorite_change",
+            "admin:recipes_favorite_changelist", "user__id__exact",
+            obj, "Нет избранных рецептов",
+        )
 
     get_subscriptions.short_description = "Подписки"
     get_recipes.short_description = "Рецепты"
@@ -109,4 +98,6 @@ class CustomUserAdmin(UserAdmin):
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_display = ("user", "author")
@@ -5,3 +5,9 @@ class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
     verbose_name = "пользователи"
+
+    def ready(self):
+        from foodgram.storage import track_media
+        from users.models import CustomUser
+
+        track_media(CustomUser)
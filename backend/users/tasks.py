@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from jobs.queue import task
+from recipes.models import Favorite, Recipe, ShoppingCart
+from recipes.tasks import delete_in_batches, purge, uncount_favorites
+from users.models import Subscription
+
+User = get_user_model()
+
+
+@task(priority=-1)
+def delete_user(user_id):
+    user = User.objects.filter(pk=user_id, is_active=False).first()
+    if user is None:
+        return
+    recipe_ids = list(Recipe.objects.filter(author_id=user_id)
+                      .values_list("pk", flat=True)
+                      [:settings.PURGE_BATCH_SIZE])
+    if recipe_ids:
+        purge(recipe_ids)
+        delete_user.delay(user_id)
+        return
+    delete_in_batches(Favorite.objects.filter(user_id=user_id),
+                      before_delete=uncount_favorites)
+    delete_in_batches(ShoppingCart.objects.filter(user_id=user_id))
+    delete_in_batches(Subscription.objects.filter(
+        Q(user_id=user_id) | Q(author_id=user_id)))
+    user.delete()